@@ -1,23 +1,72 @@
 import logging.config
 import os
 import pathlib
-
-import sentry_sdk
+import tempfile
 
 PROJECT_ROOT = pathlib.Path(__file__).parent
-
-logging.config.fileConfig(fname=PROJECT_ROOT / "logger.ini", disable_existing_loggers=False)
-
 TEST_DATA = PROJECT_ROOT / "tests" / "data"
 TG_TOKEN = os.getenv("TG_TOKEN")
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 NOTION_PAGE_ID = os.getenv("NOTION_PAGE_ID")
 SENTRY_DSN = os.getenv("SENTRY_DSN")
+SENTRY_TRACES_SAMPLE_RATE = float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", 1.0))
+METRICS_SPANS_SAMPLE_RATE = float(os.getenv("METRICS_SPANS_SAMPLE_RATE", 0))
+# SQLite file with metrics summed over server processes, only the scraped process is rendered if empty
+METRICS_PATH = os.getenv("METRICS_PATH", str(pathlib.Path(tempfile.gettempdir()) / "resume-metrics.db"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))  # Seconds between writes of a process
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 2))  # Server processes, each with its own pool of PARSER_WORKERS
+# Parser processes of every server process, together they take all CPUs. 0 to parse in a thread of the server
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", max((os.cpu_count() or 1) // WEB_CONCURRENCY, 1)))
+PARSER_QUEUE_SIZE = int(os.getenv("PARSER_QUEUE_SIZE", PARSER_WORKERS * 4))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
+NOTION_RETRIES = int(os.getenv("NOTION_RETRIES", 3))
+NOTION_RATE_LIMIT = float(os.getenv("NOTION_RATE_LIMIT", 3))  # Requests per second of all processes, 0 for no limit
+DOWNLOAD_MAX_SIZE = int(os.getenv("DOWNLOAD_MAX_SIZE", 20 * 1024 * 1024))
+UPLOAD_SPOOL_SIZE = int(os.getenv("UPLOAD_SPOOL_SIZE", 1024 * 1024))
+DOCX_MAX_SIZE = int(os.getenv("DOCX_MAX_SIZE", 32 * 1024 * 1024))  # Uncompressed document.xml
+DOCX_MAX_RATIO = int(os.getenv("DOCX_MAX_RATIO", 200))  # Uncompressed to compressed size of document.xml
+CACHE_MEMORY_SIZE = int(os.getenv("CACHE_MEMORY_SIZE", 64 * 1024 * 1024))
+CACHE_PATH = os.getenv("CACHE_PATH")
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 1024 * 1024 * 1024))
+DEDUP_PATH = os.getenv("DEDUP_PATH")  # SQLite file with known candidates, no deduplication if not set
+DEDUP_UPDATE = os.getenv("DEDUP_UPDATE", "").lower() in ("1", "true", "yes")  # Rewrite known candidate's page
+SEARCH_PATH = os.getenv("SEARCH_PATH")  # SQLite file with full-text index of parsed resumes
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", PARSER_WORKERS * 2 or 2))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 1000))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", 10000))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 5))  # Checks for jobs left by stopped processes
+JOB_PATH = os.getenv("JOB_PATH", str(pathlib.Path(tempfile.gettempdir()) / "resume-jobs.db"))  # Shared by processes
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", 100))
+BATCH_DOWNLOADS = int(os.getenv("BATCH_DOWNLOADS", 8))  # Files of a batch downloaded or being converted at once
+PORT = int(os.getenv("PORT", 5000))
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", 1000))  # Server process is replaced after that, 0 to never
+WEB_MAX_REQUESTS_JITTER = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 100))  # So processes aren't replaced all at once
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", 60))  # Unresponsive server process is killed after that
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))  # Time to finish requests on restart
+JOB_STOP_TIMEOUT = float(os.getenv("JOB_STOP_TIMEOUT", WEB_GRACEFUL_TIMEOUT * 0.8))  # Time to finish running jobs
 
 
 class LanguageError(Exception):
     pass
 
 
-if SENTRY_DSN:
-    sentry_sdk.init(SENTRY_DSN, traces_sample_rate=1.0)
+class FormatError(Exception):
+    pass
+
+
+class DocumentSizeError(Exception):
+    pass
+
+
+def setup_logging():
+    logging.config.fileConfig(fname=PROJECT_ROOT / "logger.ini", disable_existing_loggers=False)
+
+
+def init_sentry():
+    """Sentry SDK takes a while to import, so it is only loaded if configured"""
+    if SENTRY_DSN:
+        import sentry_sdk
+
+        sentry_sdk.init(SENTRY_DSN, traces_sample_rate=SENTRY_TRACES_SAMPLE_RATE)
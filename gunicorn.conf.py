@@ -0,0 +1,32 @@
+import gc
+
+from config import (
+    PORT,
+    WEB_CONCURRENCY,
+    WEB_MAX_REQUESTS,
+    WEB_MAX_REQUESTS_JITTER,
+    WEB_TIMEOUT,
+    WEB_GRACEFUL_TIMEOUT,
+)
+
+bind = f"0.0.0.0:{PORT}"
+workers = WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+# The app is imported once in the master process, workers are forked from it
+preload_app = True
+max_requests = WEB_MAX_REQUESTS
+max_requests_jitter = WEB_MAX_REQUESTS_JITTER
+timeout = WEB_TIMEOUT
+graceful_timeout = WEB_GRACEFUL_TIMEOUT
+
+
+def when_ready(server):
+    """
+    Loads langdetect profiles, compiled patterns and models before workers are forked,
+    so workers and their parser processes share these memory pages copy-on-write
+    """
+    from parser.etl import warm_up
+
+    warm_up()
+    # Keeps the collector from writing to loaded objects, which would copy their pages in every worker
+    gc.freeze()
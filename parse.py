@@ -1,12 +1,163 @@
-from notion_client import Client
+import argparse
+import asyncio
+import functools
+import glob
+import json
+import logging
+import multiprocessing
+import sys
+import time
+import typing
+from pathlib import Path
 
-from config import TEST_DATA, NOTION_TOKEN, NOTION_PAGE_ID
-from parser.etl import ResumeETL
+from config import NOTION_TOKEN, NOTION_PAGE_ID, CACHE_PATH, SEARCH_PATH, init_sentry, setup_logging
+from parser.cache import ResultCache, parse_cached
+from parser.etl import warm_up
+from parser.search import SearchIndex
 
-notion = Client(auth=NOTION_TOKEN)
+logger = logging.getLogger("parse")
+extensions = (".docx", ".html", ".htm")
+cache: typing.Optional[ResultCache] = None
 
 
-with open(TEST_DATA / "<file name>", "rb") as f:
-    extractor = ResumeETL(file=f)
-    resume = extractor.to_notion()
-    notion_resp = notion.pages.create(parent={"page_id": NOTION_PAGE_ID}, **resume)
+def init_worker(cache_path: typing.Optional[str]):
+    global cache
+    warm_up()
+    if cache_path:
+        cache = ResultCache(path=cache_path)
+
+
+def collect_files(sources: typing.List[str]) -> typing.List[str]:
+    """Expands directories and glob patterns into a list of files, directories are searched for DOCX and HTML"""
+    files = []
+    for source in sources:
+        if Path(source).is_dir():
+            files.extend(str(p) for p in Path(source).rglob("*") if p.suffix.lower() in extensions and p.is_file())
+        elif glob.has_magic(source):
+            files.extend(glob.glob(source, recursive=True))
+        else:
+            files.append(source)
+    return sorted(set(files))
+
+
+def parse_file(path: str, trusted: bool = False) -> dict:
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            record = {"file": path, "resume": parse_cached(f.read(), cache, trusted, notion=False)["resume"]}
+    except Exception as e:
+        record = {"file": path, "error": f"{type(e).__name__}: {e}"}
+    record["elapsed"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def batch(args: argparse.Namespace) -> int:
+    files = collect_files(args.sources)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    index = SearchIndex(args.index) if args.index else None
+    start, parsed, failed = time.perf_counter(), 0, 0
+    try:
+        with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args.cache,)) as pool:
+            parse_files = functools.partial(parse_file, trusted=args.trusted)
+            for record in pool.imap_unordered(parse_files, files, chunksize=args.chunksize):
+                output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                if "error" not in record:
+                    parsed += 1
+                    if index is not None:
+                        index.add(record["file"], record["resume"])
+                    continue
+                failed += 1
+                logger.error(f"{record['file']}: {record['error']}")
+                if not args.skip_errors:
+                    pool.terminate()
+                    break
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    logger.info(f"Parsed {parsed} of {len(files)} files, {failed} failed in {time.perf_counter() - start:.2f}s")
+    return 1 if failed and not args.skip_errors else 0
+
+
+def notion(args: argparse.Namespace) -> int:
+    from notion_client import AsyncClient
+
+    from parser.etl import ResumeETL
+    from parser.etl.notion import NotionConverter
+    from parser.etl.writer import NotionWriter
+
+    with open(args.file, "rb") as f:
+        etl = ResumeETL(file=f)
+    converter = NotionConverter(etl.get_sections(), etl.template_lang)
+    page = {"properties": converter.get_title(), "children": converter.iter_blocks()}  # Blocks are built as sent
+    notion_resp = asyncio.run(NotionWriter(AsyncClient(auth=NOTION_TOKEN)).create_page(NOTION_PAGE_ID, page))
+    logger.info(notion_resp.get("url"))
+    return 0
+
+
+def read_records(paths: typing.List[str]) -> typing.Iterator[typing.Tuple[str, dict, None]]:
+    """Yields parsed resumes from batch JSON lines, skipping failed files"""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if (record := json.loads(line)).get("resume"):
+                    yield record["file"], record["resume"], None
+
+
+def index(args: argparse.Namespace) -> int:
+    start = time.perf_counter()
+    count = SearchIndex(args.index).add_many(read_records(args.sources))
+    logger.info(f"Indexed {count} resumes in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def search(args: argparse.Namespace) -> int:
+    for result in SearchIndex(args.index).search(args.query, args.limit):
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return 0
+
+
+def get_args(argv: typing.Optional[typing.List[str]] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description="hh.ru resume parser")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = subparsers.add_parser("batch", help="Parse DOCX and HTML files in parallel to JSON lines")
+    batch_parser.add_argument("sources", nargs="+", help="Files, directories or glob patterns")
+    batch_parser.add_argument("-o", "--output", help="Output file, stdout by default")
+    batch_parser.add_argument("-w", "--workers", type=int, default=multiprocessing.cpu_count())
+    batch_parser.add_argument("-c", "--chunksize", type=int, default=8, help="Files sent to a worker at once")
+    batch_parser.add_argument("--skip-errors", action="store_true", help="Keep going after a file fails")
+    batch_parser.add_argument("--trusted", action="store_true", help="Skip models validation for vetted files")
+    batch_parser.add_argument("--cache", default=CACHE_PATH, help="SQLite file with cached results")
+    batch_parser.add_argument("--index", default=SEARCH_PATH, help="Also add parsed resumes to this search index")
+    batch_parser.set_defaults(handler=batch)
+
+    index_parser = subparsers.add_parser("index", help="Load batch JSON lines into the search index")
+    index_parser.add_argument("sources", nargs="+", help="JSON lines written by batch")
+    index_parser.add_argument("--index", default=SEARCH_PATH, required=SEARCH_PATH is None, help="SQLite file")
+    index_parser.set_defaults(handler=index)
+
+    search_parser = subparsers.add_parser("search", help="Find candidates in the search index")
+    search_parser.add_argument("query", help="Words to match, `word*` for a prefix")
+    search_parser.add_argument("-n", "--limit", type=int, default=20)
+    search_parser.add_argument("--index", default=SEARCH_PATH, required=SEARCH_PATH is None, help="SQLite file")
+    search_parser.set_defaults(handler=search)
+
+    notion_parser = subparsers.add_parser("notion", help="Parse one DOCX file and create a Notion page")
+    notion_parser.add_argument("file")
+    notion_parser.set_defaults(handler=notion)
+
+    return arg_parser.parse_args(argv)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    setup_logging()
+    init_sentry()
+    for handler in logging.getLogger().handlers:  # Keep stdout for JSON lines
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(sys.stderr)
+    args = get_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
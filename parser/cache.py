@@ -0,0 +1,130 @@
+import hashlib
+import io
+import pickle
+import sqlite3
+import time
+import typing
+from collections import OrderedDict
+
+from config import CACHE_MEMORY_SIZE, CACHE_PATH, CACHE_MAX_SIZE
+from parser import __version__
+
+
+def format_key(digest: str, trusted: bool = False) -> str:
+    """Unvalidated results of trusted mode are kept apart, so they are never served as validated ones"""
+    return f"{__version__}:{'trusted:' if trusted else ''}{digest}"
+
+
+def cache_key(data: bytes, trusted: bool = False) -> str:
+    return format_key(hashlib.sha256(data).hexdigest(), trusted)
+
+
+def file_key(file: typing.IO[bytes], trusted: bool = False, chunk_size: int = 64 * 1024) -> str:
+    """Returns cache_key of a seekable file without reading it into memory at once"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    while chunk := file.read(chunk_size):
+        digest.update(chunk)
+    file.seek(0)
+    return format_key(digest.hexdigest(), trusted)
+
+
+class ResultCache:
+    """
+    Two-tier cache of parsing results keyed by file content: an in-process LRU
+    and an optional SQLite file shared between processes. Both are limited by the size of pickled values
+    """
+
+    def __init__(
+        self,
+        memory_size: int = CACHE_MEMORY_SIZE,
+        path: typing.Optional[str] = CACHE_PATH,
+        max_size: int = CACHE_MAX_SIZE,
+    ):
+        self.memory: typing.OrderedDict[str, bytes] = OrderedDict()
+        self.memory_size = memory_size
+        self.memory_used = 0
+        self.max_size = max_size
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _remember(self, key: str, value: bytes):
+        if key in self.memory:
+            self.memory_used -= len(self.memory.pop(key))
+        if len(value) > self.memory_size:
+            return
+        self.memory[key] = value
+        self.memory_used += len(value)
+        while self.memory_used > self.memory_size:
+            self.memory_used -= len(self.memory.popitem(last=False)[1])
+
+    def _evict(self):
+        used = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if used <= self.max_size:
+            return
+        stale = []
+        for key, size in self.db.execute("SELECT key, size FROM results ORDER BY accessed"):
+            stale.append((key,))
+            if (used := used - size) <= self.max_size:
+                break
+        self.db.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def get(self, key: str) -> typing.Optional[dict]:
+        if (value := self.memory.get(key)) is not None:
+            self.memory.move_to_end(key)
+            return pickle.loads(value)
+        if self.db is None:
+            return None
+        if (row := self.db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()) is None:
+            return None
+        self.db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._remember(key, row[0])
+        return pickle.loads(row[0])
+
+    def set(self, key: str, result: dict):
+        value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, value)
+        if self.db is not None:
+            self.db.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._evict()
+
+
+def parse(data: typing.Union[bytes, typing.IO[bytes], str], trusted: bool = False, notion: bool = True) -> dict:
+    """
+    Returns resume sections and, unless notion is False, Notion page built from one parsing run.
+    A string is a path, parser processes open an upload spooled to disk by the server that way
+    """
+    from parser.etl import ResumeETL
+
+    if isinstance(data, str):
+        with open(data, "rb") as file:
+            return parse(file, trusted, notion)
+    file = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    etl = ResumeETL(file=file, trusted=trusted)
+    sections = etl.get_sections()
+    result = {"resume": {name: section.dict() for name, section in sections.items()}}
+    if notion:
+        from parser.etl.notion import NotionConverter
+
+        result["notion"] = NotionConverter(sections, etl.template_lang).convert_resume()
+    return result
+
+
+def parse_cached(data: bytes, cache: typing.Optional[ResultCache], trusted: bool = False, notion: bool = True) -> dict:
+    """Cached results without Notion page (parsed with notion=False) are parsed again when the page is needed"""
+    if cache is None:
+        return parse(data, trusted, notion)
+    key = cache_key(data, trusted)
+    if (result := cache.get(key)) is None or (notion and "notion" not in result):
+        result = parse(data, trusted, notion)
+        cache.set(key, result)
+    return result
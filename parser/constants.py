@@ -36,3 +36,10 @@ personal = {
 }
 
 SECTION_TITLE_MAX = 40
+TEMPLATE_LANGS = ("ru", "en")
+DOC_LANG_MARGIN = 1.5  # How many times more letters of one script than the other are enough to skip langdetect
+DOC_LANG_SAMPLE = 2000  # Max text length passed to langdetect
+NOTION_BLOCKS_MAX = 100  # Max blocks per Notion request
+ZIP_MAGIC = b"PK\x03\x04"  # DOCX is a zip archive
+FORM_OVERHEAD = 64 * 1024  # Multipart boundaries, part headers and other fields allowed besides the file
+SNIFF_SIZE = 512  # Bytes read to tell DOCX from HTML
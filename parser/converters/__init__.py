@@ -0,0 +1,25 @@
+import typing
+
+from config import FormatError
+from parser.constants import SNIFF_SIZE, ZIP_MAGIC
+from . import docx, html
+
+converters = {"docx": docx, "html": html}
+
+
+def sniff(head: bytes) -> typing.Optional[str]:
+    """Returns document format by its first SNIFF_SIZE bytes: docx, html or None"""
+    if head.startswith(ZIP_MAGIC):
+        return "docx"
+    if head.lstrip(b"\xef\xbb\xbf \t\r\n")[:1] == b"<":
+        return "html"
+    return None
+
+
+def get_paragraphs(file: typing.IO[bytes]) -> list:
+    """Returns paragraphs of a DOCX or HTML document, picking the converter by the content"""
+    head = file.read(SNIFF_SIZE)
+    file.seek(0)
+    if (doc_format := sniff(head)) is None:
+        raise FormatError("Document is neither DOCX nor HTML")
+    return converters[doc_format].get_paragraphs(file)
@@ -3,6 +3,10 @@ import zipfile
 
 from lxml import etree
 
+from config import DOCX_MAX_SIZE, DOCX_MAX_RATIO, DocumentSizeError
+from parser.metrics import timed
+from parser.normalize import merge_short
+
 # MS Word prefixes / namespace matches used in document.xml
 ns_prefixes = {
     "mo": r"{http://schemas.microsoft.com/office/mac/office/2008/main}",
@@ -27,38 +31,84 @@ spec_chars = ["(", ")"]
 
 
 def normalize_text(text: list, threshold: int) -> typing.Union[list, str]:
-    i = 1
-    while i < len(text):
-        if len(text[i].split()) < threshold or len(text[i - 1].split()) < threshold:
-            text[i - 1 : i + 1] = ["".join(text[i - 1 : i + 1])]
-            i = 0
-        i += 1
+    return merge_short(text, threshold)
+
+
+class LimitedReader:
+    """
+    Inflates a zip member chunk by chunk, failing as soon as it gets larger than max_size
+    or than max_ratio times its compressed size, whatever the zip headers say
+    """
+
+    def __init__(self, doc: zipfile.ZipFile, name: str, max_size: int = DOCX_MAX_SIZE, max_ratio: int = DOCX_MAX_RATIO):
+        info = doc.getinfo(name)
+        self.max_size = max_size
+        self.max_ratio_size = max(info.compress_size, 1) * max_ratio
+        self.size = 0
+        self.check(info.file_size)  # Declared size, rejects most bombs before inflating anything
+        self.member = doc.open(info)
+
+    def check(self, size: int):
+        if size > self.max_size:
+            raise DocumentSizeError(f"Document is larger than {self.max_size} bytes")
+        if size > self.max_ratio_size:
+            raise DocumentSizeError("Document is compressed suspiciously well")
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(64 * 1024), b""))
+        data = self.member.read(size)
+        self.size += len(data)
+        self.check(self.size)
+        return data
+
+    def __enter__(self):
+        return self
 
-    return text[0] if len(text) == 1 else text
+    def __exit__(self, *exc_info):
+        self.member.close()
 
 
 def get_xml(file: typing.IO[bytes]):
     """Returns raw MS Word xml"""
-    with zipfile.ZipFile(file) as doc:
-        xml_content = doc.read("word/document.xml")
+    with zipfile.ZipFile(file) as doc, LimitedReader(doc, "word/document.xml") as reader:
+        xml_content = reader.read()
     document = etree.fromstring(xml_content)
     return document
 
 
+def iter_paragraphs(file: typing.IO[bytes]) -> typing.Iterator[typing.Union[list, str]]:
+    """Streams document.xml out of a DOCX file, see iter_xml_paragraphs"""
+    with zipfile.ZipFile(file) as doc, LimitedReader(doc, "word/document.xml") as xml_content:
+        yield from iter_xml_paragraphs(xml_content)
+
+
+def iter_xml_paragraphs(xml_content: typing.IO[bytes]) -> typing.Iterator[typing.Union[list, str]]:
+    """
+    Yields paragraphs of document.xml as soon as they are closed.
+    Finished elements are cleared, so memory usage doesn't depend on document size
+    """
+    p_tag, t_tag = f"{ns_prefixes['w']}p", f"{ns_prefixes['w']}t"
+    depth = 0
+    for event, element in etree.iterparse(xml_content, events=("start", "end"), tag=p_tag):
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth > 0:  # Nested paragraph (e.g. text box), handled with the outer one
+            continue
+        for paragraph in element.iter(p_tag):
+            p_line = [t.text.replace("\xa0", " ") for t in paragraph.iter(t_tag) if t.text]
+            if len(p_line) > 1:
+                yield p_line
+            elif len(p_line) == 1:
+                yield p_line[0]
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+@timed("get_paragraphs")
 def get_paragraphs(file: typing.IO[bytes]) -> list:
     """Returns the raw text of a document as a list of paragraphs"""
-    doc_xml = get_xml(file)
-    paragraphs = [element for element in doc_xml.iter() if element.tag == f"{ns_prefixes['w']}p"]
-    text = []
-
-    for paragraph in paragraphs:
-        p_line = []
-        for element in paragraph.iter():
-            if element.tag == f"{ns_prefixes['w']}t" and element.text:
-                p_line.append(element.text.replace("\xa0", " "))
-        if len(p_line) > 0:
-            if len(p_line) > 1:
-                text.append(p_line)
-            else:
-                text.extend(p_line)
-    return text
+    return list(iter_paragraphs(file))
@@ -0,0 +1,90 @@
+import re
+import typing
+
+from lxml import etree
+
+from parser.metrics import timed
+
+# Elements that start a new paragraph, the rest (span, b, a...) are runs of the current one
+block_tags = {
+    "address", "article", "aside", "blockquote", "body", "br", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "html", "li", "main", "nav",
+    "ol", "p", "pre", "section", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+}  # fmt: skip
+skip_tags = {"head", "script", "style", "noscript", "template"}
+space_re = re.compile(r"\s+")
+chunk_size = 64 * 1024
+
+
+def make_paragraph(runs: typing.List[str]) -> typing.Union[list, str, None]:
+    """Collapses whitespace as a browser does, returns a string for a single run and a list for several"""
+    p_line = []
+    for run in runs:
+        run = space_re.sub(" ", run.replace("\xa0", " "))
+        if not p_line:
+            run = run.lstrip()
+        if not run:
+            continue
+        if run == " ":  # Space between inline elements belongs to the previous run
+            p_line[-1] = p_line[-1] if p_line[-1].endswith(" ") else p_line[-1] + " "
+            continue
+        p_line.append(run)
+    if p_line:
+        p_line[-1] = p_line[-1].rstrip()
+    if len(p_line) > 1:
+        return p_line
+    return p_line[0] if p_line else None
+
+
+def read_events(parser: etree.HTMLPullParser, file: typing.IO[bytes]) -> typing.Iterator[tuple]:
+    while chunk := file.read(chunk_size):
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def iter_paragraphs(file: typing.IO[bytes]) -> typing.Iterator[typing.Union[list, str]]:
+    """
+    Feeds HTML to a pull parser chunk by chunk and yields paragraphs as soon as they are closed.
+    Element text is only known at the next parser event, so it is read one event later.
+    Finished elements are cleared, so memory usage doesn't depend on document size
+    """
+    parser = etree.HTMLPullParser(events=("start", "end", "comment", "pi"))
+    runs: typing.List[str] = []
+    pending, skip = None, 0  # (element, "text" or "tail") to read at the next event, depth inside skipped tags
+
+    def read_pending():
+        if pending is not None and not skip and (text := getattr(*pending)):
+            runs.append(text)
+
+    def flush() -> typing.Iterator[typing.Union[list, str]]:
+        if (paragraph := make_paragraph(runs)) is not None:
+            yield paragraph
+        runs.clear()
+
+    for event, element in read_events(parser, file):
+        read_pending()
+        tag = element.tag if isinstance(element.tag, str) else None
+        if event == "start":
+            skip += tag in skip_tags
+            if tag in block_tags:
+                yield from flush()
+            pending = (element, "text")
+            continue
+        if event == "end":
+            skip -= tag in skip_tags
+            if tag in block_tags:
+                yield from flush()
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        pending = (element, "tail")
+    read_pending()
+    yield from flush()
+
+
+@timed("get_paragraphs")
+def get_paragraphs(file: typing.IO[bytes]) -> list:
+    """Returns the text of an HTML document as a list of paragraphs, in the same shape as the DOCX converter"""
+    return list(iter_paragraphs(file))
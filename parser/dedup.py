@@ -0,0 +1,59 @@
+import re
+import sqlite3
+import time
+import typing
+
+from config import DEDUP_PATH
+
+non_digit_re = re.compile(r"\D")
+
+
+def normalize_phone(phone: str) -> typing.Optional[str]:
+    """Returns phone digits with the country code, 8 (999) 123-45-67 and +7 999 123 45 67 are the same"""
+    digits = non_digit_re.sub("", phone)
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = f"7{digits[1:]}"
+    elif len(digits) == 10:
+        digits = f"7{digits}"
+    return digits if len(digits) >= 10 else None
+
+
+def fingerprints(contacts: typing.Optional[dict]) -> typing.List[str]:
+    """Returns normalized phones and emails of a parsed contacts section"""
+    if not contacts:
+        return []
+    phones = {f"phone:{p}" for phone in contacts.get("phones") or [] if phone and (p := normalize_phone(phone))}
+    emails = {f"email:{email.strip().lower()}" for email in contacts.get("emails") or [] if email}
+    return sorted(phones | emails)
+
+
+class CandidateIndex:
+    """
+    Maps contact fingerprints to Notion pages. Kept in a SQLite file, so it survives restarts
+    and can be shared by several worker processes (WAL mode, writes wait for each other)
+    """
+
+    def __init__(self, path: str = DEDUP_PATH):
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS candidates (fingerprint TEXT PRIMARY KEY, page_id TEXT, url TEXT, updated REAL)"
+        )
+
+    def find(self, keys: typing.List[str]) -> typing.Optional[dict]:
+        """Returns the page of a candidate with any of the fingerprints"""
+        if not keys:
+            return None
+        placeholders = ", ".join("?" * len(keys))
+        query = (
+            f"SELECT page_id, url FROM candidates WHERE fingerprint IN ({placeholders}) ORDER BY updated DESC LIMIT 1"
+        )
+        row = self.db.execute(query, keys).fetchone()
+        return {"page_id": row[0], "url": row[1]} if row else None
+
+    def add(self, keys: typing.List[str], page_id: str, url: typing.Optional[str]):
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO candidates (fingerprint, page_id, url, updated) VALUES (?, ?, ?, ?)",
+            [(key, page_id, url, now) for key in keys],
+        )
@@ -1 +1,10 @@
-from .resume import ResumeETL
+from .warmup import warm_up
+
+
+def __getattr__(name: str):
+    # ResumeETL pulls in models, language packs and converters, so it is imported on first use only
+    if name == "ResumeETL":
+        from .resume import ResumeETL
+
+        return ResumeETL
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
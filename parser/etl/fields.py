@@ -5,11 +5,22 @@ from typing import Union, Optional
 
 import funcy as fc
 
-from parser.constants import months, genders, years_months, born_on, citizenship, own_car, willing
 from parser.models import Experience, Education, Languages, AdditionalEducation
+from parser.models.utils import build
+from .packs import LanguagePack
 
 logger = logging.getLogger(__name__)
 
+email_re = re.compile(r"([^@|\s]+@[^@]+\.[^@|\s]+)")
+phone_re = re.compile(r"\+?\d{1,3}\s?\(?\d{3}\)?\s?\d{2,3}[\s.-]\d{2,3}[\s.-]\d{2,3}")
+link_re = re.compile(r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+")
+updated_re = re.compile(r"(\d{2}\.\d{2}\.\d{4})\s\d{2}:\d{2}")
+day_re = re.compile(r"\d{1,2}")
+word_re = re.compile(r"[a-zA-Zа-яА-Я]+")
+year_re = re.compile(r"\d{4}")
+digit_re = re.compile(r"\d")
+degree_re = re.compile(r"\((.*)\)")
+
 
 def join_text(func):
     """If a list of strings passed, converts it to one string"""
@@ -21,21 +32,21 @@ def join_text(func):
 
 
 class FieldsExtractor:
-    def __init__(self, template_lang, doc_lang):
-        self.template_lang = template_lang
-        self.doc_lang = doc_lang
+    def __init__(self, pack: LanguagePack, trusted: bool = False):
+        self.pack = pack
+        self.trusted = trusted
 
     @join_text
     def extract_gender(self, text: str) -> Optional[str]:
-        for gender in genders[self.template_lang]:
-            if res := re.search(gender, text):
-                return res.group()
+        for gender in self.pack.genders:
+            if gender in text:
+                return gender
         return
 
     @join_text
     def extract_age(self, text: str) -> Optional[int]:
-        for y in years_months[self.template_lang]:
-            if res := re.search(fr"(\d+)\s+{y}", text):
+        for pattern in self.pack.age_re:
+            if res := pattern.search(text):
                 return int(res.group(1))
         return
 
@@ -45,35 +56,32 @@ class FieldsExtractor:
         Possible date formats: dd.mm.yyyy / dd.mm
         """
         birthday = ""
-        for b in born_on[self.template_lang]:
-            if res := re.search(fr"{b}(.*)", text):
+        for pattern in self.pack.born_on_re:
+            if res := pattern.search(text):
                 res_str = res.group(1)
-                if day := re.search(r"\d{1,2}", res_str):
+                if day := day_re.search(res_str):
                     birthday += f"{int(day.group()):02d}"
-                if month := re.search(r"[a-zA-Zа-яА-Я]+", res_str):
-                    month = month.group()
-                    for _month in months:
-                        if any(m in month for m in _month["name"][self.template_lang]):
-                            birthday += f".{_month['value']:02d}"
-                if year := re.search(r"\d{4}", res_str):
+                if (month := word_re.search(res_str)) and (month_value := self.pack.month(month.group())):
+                    birthday += f".{month_value:02d}"
+                if year := year_re.search(res_str):
                     birthday += f".{year.group()}"
         return birthday if len(birthday) > 0 else None
 
     @join_text
     def extract_email(self, text: str) -> Optional[str]:
-        if email := re.findall(r"([^@|\s]+@[^@]+\.[^@|\s]+)", text):
+        if email := email_re.findall(text):
             return email[0]
         return
 
     @join_text
     def extract_phone(self, text: str) -> Optional[str]:
-        if phone := re.findall(r"\+?\d{1,3}\s?\(?\d{3}\)?\s?\d{2,3}[\s.-]\d{2,3}[\s.-]\d{2,3}", text):
+        if phone := phone_re.findall(text):
             return phone[0]
         return
 
     @join_text
     def extract_link(self, text: str) -> Optional[str]:
-        if link := re.findall(r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+", text):
+        if link := link_re.findall(text):
             return link[0]
         return
 
@@ -81,13 +89,13 @@ class FieldsExtractor:
     def extract_location(self, text: str) -> Optional[str]:
         location = []
         for word in text.split(","):
-            if willing[self.template_lang] in word:
+            if self.pack.willing in word:
                 return ", ".join(location)
             location.append(word)
 
     @join_text
     def extract_updated(self, text: str) -> Optional[datetime]:
-        if match := re.search(r"(\d{2}\.\d{2}\.\d{4})\s\d{2}:\d{2}", text):
+        if match := updated_re.search(text):
             try:
                 d_t = datetime.strptime(match.group(), "%d.%m.%Y %H:%M")
                 return d_t
@@ -96,19 +104,18 @@ class FieldsExtractor:
 
     @join_text
     def extract_salary(self, text: str) -> Optional[str]:
-        if len(re.findall(r"\d", text)) > 3:
+        if len(digit_re.findall(text)) > 3:
             return text
 
     @join_text
     def extract_experience_total(self, text: str) -> Optional[str]:
-        if match := re.search(fr"\d+.+({'|'.join(years_months[self.template_lang])}).*", text, re.IGNORECASE):
+        if match := self.pack.experience_total_re.search(text):
             return match.group()
         return
 
     def extract_experience_items(self, text: list) -> list:
-        _months = [m for _month in months for m in _month["name"][self.template_lang]]
         indices = [
-            *[i for i, p in enumerate(text) if (_p := fc.str_join(p).lower()) and any(m in _p for m in _months)],
+            *[i for i, p in enumerate(text) if self.pack.months_re.search(fc.str_join(p).lower())],
             len(text),
         ]  # Experience item always starts with duration containing months
         fields = ["duration", "total", "company", "company_info", "position", "other"]
@@ -117,45 +124,50 @@ class FieldsExtractor:
         items = []
         for i, next_ in fc.with_next(indices, fill=0):
             if next_ - i == len(fields):
-                items.append(Experience.Item(**dict(zip(fields, text[i:next_]))))
+                items.append(build(Experience.Item, self.trusted, **dict(zip(fields, text[i:next_]))))
             elif next_ - i == len(fields_w):
-                items.append(Experience.Item(**dict(zip(fields_w, text[i:next_]))))
+                items.append(build(Experience.Item, self.trusted, **dict(zip(fields_w, text[i:next_]))))
         return items
 
     def extract_own_car(self, text: list) -> bool:
-        return any(s == own_car["has"][self.template_lang] for s in text)
+        return any(fc.str_join(s) == self.pack.own_car for s in text)
 
     def extract_driving_categories(self, text: list) -> list:
         categories = []
-        for s in text:
-            if s != own_car["has"][self.template_lang]:
+        for s in map(fc.str_join, text):  # A paragraph of several runs is a list
+            if s != self.pack.own_car:
                 categories = [w.replace(",", "") for w in s.split() if len(w) <= 3]
         return categories
 
-    @staticmethod
-    def extract_education_items(text: list) -> list:
+    def extract_education_items(self, text: list) -> list:
         indices = [i for i, x in enumerate(text) if fc.str_join(x).isdigit()]
         fields = list(Education.Item.__fields__.keys())
-        items = [Education.Item(**dict(zip(fields, text[i:next_]))) for i, next_ in fc.with_next(indices)]
+        items = [
+            build(Education.Item, self.trusted, **dict(zip(fields, text[i:next_])))
+            for i, next_ in fc.with_next(indices)
+        ]
         return items
 
-    @staticmethod
-    def extract_additional_edu_items(text: list) -> list:
+    def extract_additional_edu_items(self, text: list) -> list:
         indices = [i for i, x in enumerate(text) if fc.str_join(x).isdigit()]
         fields = list(AdditionalEducation.Item.__fields__.keys())
-        items = [AdditionalEducation.Item(**dict(zip(fields, text[i:next_]))) for i, next_ in fc.with_next(indices)]
+        items = [
+            build(AdditionalEducation.Item, self.trusted, **dict(zip(fields, text[i:next_])))
+            for i, next_ in fc.with_next(indices)
+        ]
         return items
 
-    @staticmethod
-    def extract_languages_items(text: list) -> list:
+    def extract_languages_items(self, text: list) -> list:
         items = [
-            Languages.Item(name=lang_i[0], lvl=", ".join(lang_i[1:])) for item in text if (lang_i := str(item).split(" — "))
+            build(Languages.Item, self.trusted, name=lang_i[0], lvl=", ".join(lang_i[1:]))
+            for item in text
+            if (lang_i := str(item).split(" — "))
         ]
         return items
 
     @join_text
     def extract_degree(self, text: str) -> Optional[str]:
-        if match := re.search(r"\((.*)\)", text):
+        if match := degree_re.search(text):
             return match.group(1)
         return text
 
@@ -163,8 +175,8 @@ class FieldsExtractor:
         result = {}
         for p in text:
             _p = fc.str_join(p)
-            for k, v in citizenship.items():
-                if re.search(v[self.template_lang], _p, re.IGNORECASE):
+            for k, pattern in self.pack.citizenship_re.items():
+                if pattern.search(_p):
                     result[k] = _p.split(": ")[1]
         return result
 
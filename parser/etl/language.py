@@ -0,0 +1,38 @@
+import math
+import re
+from typing import Optional
+
+from parser.constants import DOC_LANG_MARGIN, DOC_LANG_SAMPLE
+
+cyrillic_re = re.compile(r"[а-яё]", re.IGNORECASE)
+latin_re = re.compile(r"[a-z]", re.IGNORECASE)
+
+
+def sample_text(paragraphs: list, limit: int) -> str:
+    """Returns evenly spaced paragraphs joined into a text no longer than limit"""
+    length = sum(len(p) for p in paragraphs)
+    step = max(1, math.ceil(length / limit))
+    return " ".join(paragraphs[::step])[:limit]
+
+
+def detect_doc_lang(paragraphs: list) -> Optional[str]:
+    """
+    Returns "ru" / "en" by comparing counts of cyrillic and latin letters if one of them clearly prevails,
+    otherwise falls back to langdetect on a sample of the text.
+    Russian IT resumes have plenty of latin letters in technologies, emails and links, about a quarter of all
+    """
+    cyrillic = sum(len(cyrillic_re.findall(p)) for p in paragraphs)
+    latin = sum(len(latin_re.findall(p)) for p in paragraphs)
+    if cyrillic + latin:
+        if cyrillic >= latin * DOC_LANG_MARGIN:
+            return "ru"
+        if latin >= cyrillic * DOC_LANG_MARGIN:
+            return "en"
+
+    from langdetect import DetectorFactory, detect_langs
+
+    DetectorFactory.seed = 0
+    for _l in detect_langs(sample_text(paragraphs, DOC_LANG_SAMPLE)):
+        if _l.lang == "ru" or _l.lang == "en":
+            return _l.lang
+    return None
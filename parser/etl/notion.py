@@ -1,25 +1,27 @@
-import copy
 import logging
-from collections import defaultdict
+import typing
 
+import parser.models as models
 from parser.constants import personal, total, own_car, citizenship
+from parser.metrics import timed
 
 logger = logging.getLogger(__name__)
 
 
 class NotionConverter:
-    def __init__(self, sections: dict, template_lang: str):
-        sections = copy.deepcopy(sections)
-        _general = sections.pop("general")
-        _contacts = sections.pop("contacts") if "contacts" in sections else defaultdict(lambda: "")
+    """Converts section models to Notion blocks, reading them without copying or changing"""
+
+    def __init__(self, sections: typing.Dict[str, models.Section], template_lang: str):
+        _general = sections["general"]
+        _contacts = sections.get("contacts")
         self.personal = {
-            "name": _general["name"] if _general["name"] else "-",
-            "birthday": _general["birthday"] if _general["birthday"] else "-",
-            "contacts": ", ".join([*_contacts["phones"], *_contacts["emails"], *_contacts["links"]]),
-            "location": _contacts["location"] if _contacts["location"] else "-",
+            "name": _general.name if _general.name else "-",
+            "birthday": _general.birthday if _general.birthday else "-",
+            "contacts": ", ".join([*_contacts.phones, *_contacts.emails, *_contacts.links]) if _contacts else "",
+            "location": _contacts.location if _contacts and _contacts.location else "-",
             "position": f"_{p}" if (p := sections.get("name")) else "",
         }
-        self.sections = sections
+        self.sections = {k: v for k, v in sections.items() if k not in ("general", "contacts")}
         self.template_lang = template_lang
 
     @staticmethod
@@ -66,26 +68,26 @@ class NotionConverter:
             ),
         ]
 
-    def convert_experience(self, section: dict) -> list:
+    def convert_experience(self, section: models.Section) -> list:
         def convert_items() -> list:
             items = []
-            for item in section["items"]:
+            for item in section.items:
                 other = (
-                    [self.block_wrapper("paragraph", self.text_wrapper(i)) for i in item["other"]]
-                    if isinstance(item["other"], list)
-                    else [self.block_wrapper("paragraph", self.text_wrapper(item["other"]))]
+                    [self.block_wrapper("paragraph", self.text_wrapper(i)) for i in item.other]
+                    if isinstance(item.other, list)
+                    else [self.block_wrapper("paragraph", self.text_wrapper(item.other))]
                 )
                 items.extend(
                     [
                         self.block_wrapper(
                             "paragraph",
                             self.text_wrapper(
-                                f"{item['duration']} - {item['company']}{', %s'%item['company_info'] if item['company_info'] else ''}",
+                                f"{item.duration} - {item.company}{', %s' % item.company_info if item.company_info else ''}",
                                 bold=True,
                                 color="gray_background",
                             ),
                         ),
-                        self.block_wrapper("paragraph", self.text_wrapper(item["position"], bold=True)),
+                        self.block_wrapper("paragraph", self.text_wrapper(item.position, bold=True)),
                         *other,
                     ]
                 )
@@ -93,93 +95,95 @@ class NotionConverter:
 
         return [
             self.block_wrapper(
-                "paragraph", self.text_wrapper(f"{total[self.template_lang]} {section['total']}", bold=True)
+                "paragraph", self.text_wrapper(f"{total[self.template_lang]} {section.total}", bold=True)
             ),
             *convert_items(),
         ]
 
-    def convert_skills(self, section: dict) -> list:
-        return [self.block_wrapper("bulleted_list_item", self.text_wrapper(item)) for item in section["items"]]
+    def convert_skills(self, section: models.Section) -> list:
+        return [self.block_wrapper("bulleted_list_item", self.text_wrapper(item)) for item in section.items]
 
-    def convert_driving(self, section: dict) -> list:
+    def convert_driving(self, section: models.Section) -> list:
         return [
             self.block_wrapper(
                 "paragraph",
-                self.text_wrapper(f"{own_car['has'][self.template_lang]}: {'+' if section['own_car'] else '-'}"),
+                self.text_wrapper(f"{own_car['has'][self.template_lang]}: {'+' if section.own_car else '-'}"),
             ),
             self.block_wrapper(
                 "paragraph",
-                self.text_wrapper(f"{own_car['categories'][self.template_lang]}: {', '.join(section['categories'])}"),
+                self.text_wrapper(f"{own_car['categories'][self.template_lang]}: {', '.join(section.categories)}"),
             ),
         ]
 
-    def convert_about(self, section: dict) -> list:
-        if isinstance(section["text"], list):
-            return [self.block_wrapper("paragraph", self.text_wrapper(p)) for p in section["text"]]
-        return [self.block_wrapper("paragraph", self.text_wrapper(section["text"]))]
+    def convert_about(self, section: models.Section) -> list:
+        if isinstance(section.text, list):
+            return [self.block_wrapper("paragraph", self.text_wrapper(p)) for p in section.text]
+        return [self.block_wrapper("paragraph", self.text_wrapper(section.text))]
 
-    def convert_recommendations(self, section: dict) -> list:
+    def convert_recommendations(self, section: models.Section) -> list:
         return self.convert_skills(section)
 
-    def convert_education(self, section: dict) -> list:
+    def convert_education(self, section: models.Section) -> list:
         items = []
-        for item in section["items"]:
+        for item in section.items:
             items.extend(
                 [
-                    self.block_wrapper("paragraph", self.text_wrapper(f"{item['name']} - {item['year']}", bold=True)),
-                    self.block_wrapper("paragraph", self.text_wrapper(item["other"])),
+                    self.block_wrapper("paragraph", self.text_wrapper(f"{item.name} - {item.year}", bold=True)),
+                    self.block_wrapper("paragraph", self.text_wrapper(item.other)),
                 ]
             )
         return items
 
-    def convert_languages(self, section: dict) -> list:
+    def convert_languages(self, section: models.Section) -> list:
         return [
-            self.block_wrapper("bulleted_list_item", self.text_wrapper(f"{item['name']}: {item['lvl']}"))
-            for item in section["items"]
+            self.block_wrapper("bulleted_list_item", self.text_wrapper(f"{item.name}: {item.lvl}"))
+            for item in section.items
         ]
 
-    def convert_additional_edu(self, section: dict) -> list:
+    def convert_additional_edu(self, section: models.Section) -> list:
         return [
             self.block_wrapper(
                 "bulleted_list_item",
-                self.text_wrapper(f"{item['name']} - {item['year']}. ", bold=True),
-                self.text_wrapper(item["other"]),
+                self.text_wrapper(f"{item.name} - {item.year}. ", bold=True),
+                self.text_wrapper(item.other),
             )
-            for item in section["items"]
+            for item in section.items
         ]
 
-    def convert_tests(self, section: dict) -> list:
+    def convert_tests(self, section: models.Section) -> list:
         return self.convert_additional_edu(section)
 
-    def convert_citizenship(self, section: dict) -> list:
+    def convert_citizenship(self, section: models.Section) -> list:
         return [
             self.block_wrapper(
                 "paragraph",
-                self.text_wrapper(f"{citizenship['citizenship'][self.template_lang]}: {section['citizenship']}"),
+                self.text_wrapper(f"{citizenship['citizenship'][self.template_lang]}: {section.citizenship}"),
             ),
             self.block_wrapper(
                 "paragraph",
-                self.text_wrapper(f"{citizenship['permission'][self.template_lang]}: {section['permission']}"),
+                self.text_wrapper(f"{citizenship['permission'][self.template_lang]}: {section.permission}"),
             ),
             self.block_wrapper(
-                "paragraph", self.text_wrapper(f"{citizenship['commute'][self.template_lang]}: {section['commute']}")
+                "paragraph", self.text_wrapper(f"{citizenship['commute'][self.template_lang]}: {section.commute}")
             ),
         ]
 
-    def convert_section(self, attr_name: str, data: dict) -> list:
-        try:
-            converter = getattr(self, f"convert_{attr_name}")
-            section_title = self.block_wrapper("heading_2", self.text_wrapper(data.pop("title")[self.template_lang]))
-            section_content = converter(data)
-            return [section_title, *section_content]
-        except AttributeError:
-            pass
+    def convert_technologies(self, section: models.Section) -> list:
+        return [self.block_wrapper("paragraph", self.text_wrapper(", ".join(section.items)))]
+
+    def convert_section(self, attr_name: str, section: models.Section) -> typing.Optional[list]:
+        if (converter := getattr(self, f"convert_{attr_name}", None)) is None:
+            return None
+        section_title = self.block_wrapper("heading_2", self.text_wrapper(getattr(section.title, self.template_lang)))
+        return [section_title, *converter(section)]
+
+    def iter_blocks(self) -> typing.Iterator[dict]:
+        """Yields page blocks section by section"""
+        yield from self.get_general()
+        for name, section in self.sections.items():
+            yield from self.convert_section(name, section) or ()
 
+    @timed("convert_resume")
     def convert_resume(self) -> dict:
         """Returns resume as Notion page"""
-        resume = self.get_general()
-        for name, content in self.sections.items():
-            if section := self.convert_section(name, content):
-                resume.extend(section)
-        # TODO: workaround for Notion limits, temporary solution
-        return {"properties": self.get_title(), "children": resume[:100]}
+        return {"properties": self.get_title(), "children": list(self.iter_blocks())}
@@ -0,0 +1,46 @@
+import re
+from typing import Optional
+
+import parser.models as models
+from parser.constants import (
+    TEMPLATE_LANGS,
+    born_on,
+    citizenship,
+    genders,
+    months,
+    own_car,
+    show_more,
+    willing,
+    years_months,
+)
+
+
+class LanguagePack:
+    """Template language data from parser.constants with precompiled patterns and lookup tables"""
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.genders = genders[lang]
+        self.age_re = [re.compile(rf"(\d+)\s+{y}") for y in years_months[lang]]
+        self.born_on_re = [re.compile(rf"{b}(.*)") for b in born_on[lang]]
+        self.months = {name: month["value"] for month in months for name in month["name"][lang]}
+        self.months_re = re.compile("|".join(map(re.escape, self.months)))
+        self.experience_total_re = re.compile(rf"\d+.+({'|'.join(years_months[lang])}).*", re.IGNORECASE)
+        self.citizenship_re = {k: re.compile(v[lang], re.IGNORECASE) for k, v in citizenship.items()}
+        self.own_car = own_car["has"][lang]
+        self.willing = willing[lang]
+        self.show_more = show_more[lang]
+        self.sections_re = {
+            k: (v["title"], re.compile(v["title"], re.IGNORECASE))
+            for k, s in models.all_sections.items()
+            if (v := s.re(lang))
+        }
+
+    def month(self, word: str) -> Optional[int]:
+        """Returns month number by its name or a word containing it"""
+        if word in self.months:
+            return self.months[word]
+        return next((value for name, value in self.months.items() if name in word), None)
+
+
+packs = {lang: LanguagePack(lang) for lang in TEMPLATE_LANGS}
@@ -1,19 +1,24 @@
 import logging
 import re
 import typing
-from collections import defaultdict
 
 import funcy as fc
-from langdetect import DetectorFactory, detect_langs
 
 import parser.models as models
+from parser.models.utils import build
 from config import LanguageError
-from parser.constants import SECTION_TITLE_MAX, show_more
-from parser.converters.docx import get_paragraphs
+from parser.converters import get_paragraphs
+from parser.metrics import timed
 from .fields import FieldsExtractor
+from .language import detect_doc_lang
 from .notion import NotionConverter
+from .packs import packs
+from .sections import SectionDetector
+from .skills import extract_skills
 
 logger = logging.getLogger(__name__)
+# Sections built from other sections rather than from resume paragraphs
+derived_sections = ("technologies",)
 
 
 def slice_raw(func):
@@ -24,58 +29,43 @@ def slice_raw(func):
 
 
 class ResumeETL:
-    def __init__(self, file: typing.IO[bytes]):
+    def __init__(self, file: typing.IO[bytes], trusted: bool = False):
+        self.trusted = trusted
         self.raw_paragraphs = get_paragraphs(file)
+        with timed("detect_sections"):
+            self.detector = SectionDetector(self.raw_paragraphs)
         self.template_lang, self.doc_lang = self.detect_language()
         self.filter_paragraphs()
         self.sections = self.fetch_sections(self.template_lang)
         self.populate_sections_raw()
-        self.fields = FieldsExtractor(self.template_lang, self.doc_lang)
+        self.fields = FieldsExtractor(packs[self.template_lang], trusted)
+        self.parsed: typing.Dict[str, typing.Optional[models.Section]] = {}
 
+    @timed("detect_language")
     def detect_language(self) -> typing.Tuple[str, str]:
-        DetectorFactory.seed = 0
-        ru_sections, en_sections = self.fetch_sections("ru"), self.fetch_sections("en")
-        if len(ru_sections) > len(en_sections):
-            template_lang = "ru"
-            sections = [title for _, v in ru_sections.items() if len((title := v["title"])) > 0]
-        else:
-            template_lang = "en"
-            sections = [title for _, v in en_sections.items() if len((title := v["title"])) > 0]
-
-        content = " ".join(
-            [p for p in fc.flatten(self.raw_paragraphs) if not any(re.match(str(s), p) for s in sections)]
-        )
-        doc_lang = None
-        for _l in detect_langs(content):
-            if _l.lang == "ru" or _l.lang == "en":
-                doc_lang = _l.lang
-                break
-        if not doc_lang:
+        fetched = {lang: self.detector.fetch(lang) for lang in packs}
+        # The template with most sections found wins, a tie goes to the later one in TEMPLATE_LANGS
+        template_lang = max(reversed(fetched), key=lambda lang: len(fetched[lang]))
+        sections = [title for _, v in fetched[template_lang].items() if len((title := v["title"])) > 0]
+
+        titles_re = re.compile("|".join(f"(?:{s})" for s in sections))
+        content = [p for p in fc.flatten(self.raw_paragraphs) if not (sections and titles_re.match(p))]
+        if not (doc_lang := detect_doc_lang(content)):
             raise LanguageError
         return template_lang, doc_lang
 
     def filter_paragraphs(self):
         def predicate(item: str) -> bool:
-            if show_more[self.template_lang] in fc.str_join(item):
+            if packs[self.template_lang].show_more in fc.str_join(item):
                 return False
             return True
 
         self.raw_paragraphs = fc.lfilter(lambda i: predicate(i), self.raw_paragraphs)
 
+    @timed("fetch_sections")
     def fetch_sections(self, lang: str) -> dict:
-        """Returns sections presented in current resume"""
-        sections = defaultdict()
-        sections["general"] = {"title": "", "index": (curr_index := 0)}
-
-        sections_re = {k: v.re(lang) for k, v in models.all_sections.items()}
-        for k, v in sections_re.items():
-            for i, par in enumerate(self.raw_paragraphs):
-                if len(par_flat := fc.str_join(par)) < SECTION_TITLE_MAX:
-                    if re.search(fr"{v['title']}", par_flat, re.IGNORECASE) and i > curr_index:
-                        sections[k] = {"title": v["title"], "index": i}
-                        curr_index = i
-
-        return sections
+        """Returns sections presented in filtered paragraphs"""
+        return self.detector.fetch(lang, visible=True)
 
     def populate_sections_raw(self):
         """Populates sections with raw content"""
@@ -83,6 +73,9 @@ class ResumeETL:
             i_next = s_next[1]["index"] if s_next else len(self.raw_paragraphs)
             self.sections[s[0]]["raw"] = self.raw_paragraphs[s[1]["index"] : i_next]
 
+    def build(self, model: typing.Type[models.Section], **values) -> models.Section:
+        return build(model, self.trusted, **values)
+
     def get_general(self, raw: list) -> models.General:
         if "сайте" in raw[0]:
             raw.pop(0)
@@ -90,7 +83,8 @@ class ResumeETL:
             name = None
         else:
             name = raw.pop(0)
-        section = models.General(
+        section = self.build(
+            models.General,
             name=name,
             gender=self.fields.extract("gender", raw),
             age=self.fields.extract("age", raw),
@@ -101,7 +95,8 @@ class ResumeETL:
     @slice_raw
     def get_contacts(self, raw: list) -> models.Contacts:
         _raw = fc.lflatten(raw)
-        section = models.Contacts(
+        section = self.build(
+            models.Contacts,
             emails=[i for p in _raw if (i := self.fields.extract("email", p))],
             phones=[i for p in _raw if (i := self.fields.extract("phone", p))],
             links=[i for p in _raw if (i := self.fields.extract("link", p))],
@@ -110,7 +105,8 @@ class ResumeETL:
         return section
 
     def get_position(self, raw: list) -> models.Position:
-        section = models.Position(
+        section = self.build(
+            models.Position,
             updated=self.fields.extract("updated", raw.pop(0)),
             name=raw.pop(0),
             salary=self.fields.extract("salary", fc.first(raw)),
@@ -118,7 +114,8 @@ class ResumeETL:
         return section
 
     def get_experience(self, raw: list) -> models.Experience:
-        section = models.Experience(
+        section = self.build(
+            models.Experience,
             total=self.fields.extract("experience.total", raw.pop(0)),
             items=self.fields.extract("experience.items", raw),
         )
@@ -126,12 +123,13 @@ class ResumeETL:
 
     @slice_raw
     def get_skills(self, raw: list) -> models.Skills:
-        section = models.Skills(items=fc.flatten(raw))
+        section = self.build(models.Skills, items=fc.lflatten(raw))
         return section
 
     @slice_raw
     def get_driving(self, raw: list) -> models.Driving:
-        section = models.Driving(
+        section = self.build(
+            models.Driving,
             own_car=self.fields.extract("own_car", raw),
             categories=self.fields.extract("driving_categories", raw),
         )
@@ -139,64 +137,96 @@ class ResumeETL:
 
     @slice_raw
     def get_about(self, raw: list) -> models.About:
-        return models.About(text=raw[0])
+        return self.build(models.About, text=raw[0])
 
     @slice_raw
     def get_recommendations(self, raw: list) -> models.Recommendations:
-        return models.Recommendations(items=raw)
+        return self.build(models.Recommendations, items=raw)
 
     @staticmethod
     def get_portfolio(raw: list):
         pass
 
     def get_education(self, raw: list) -> models.Education:
-        section = models.Education(
-            degree=self.fields.extract("degree", raw.pop(0)), items=self.fields.extract("education.items", raw)
+        section = self.build(
+            models.Education,
+            degree=self.fields.extract("degree", raw.pop(0)),
+            items=self.fields.extract("education.items", raw),
         )
         return section
 
     @slice_raw
     def get_languages(self, raw: list) -> models.Languages:
-        section = models.Languages(items=self.fields.extract("languages.items", raw))
+        section = self.build(models.Languages, items=self.fields.extract("languages.items", raw))
         return section
 
     @slice_raw
     def get_certificates(self, raw: list) -> models.Certificates:
-        section = models.Certificates(other=raw)
+        section = self.build(models.Certificates, other=raw)
         return section
 
     @slice_raw
     def get_additional_edu(self, raw: list) -> models.AdditionalEducation:
-        section = models.AdditionalEducation(items=self.fields.extract("additional_edu.items", raw))
+        section = self.build(models.AdditionalEducation, items=self.fields.extract("additional_edu.items", raw))
         return section
 
     @slice_raw
     def get_tests(self, raw: list) -> models.Tests:
-        section = models.Tests(items=self.fields.extract("additional_edu.items", raw))
+        section = self.build(models.Tests, items=self.fields.extract("additional_edu.items", raw))
         return section
 
     @slice_raw
     def get_citizenship(self, raw: list) -> models.Citizenship:
-        section = models.Citizenship(**self.fields.extract("citizenship", raw))
+        section = self.build(models.Citizenship, **self.fields.extract("citizenship", raw))
         return section
 
-    def get_section(self, attr_name: str, data: list):
-        try:
-            getter = getattr(self, f"get_{attr_name}")
-            return getter(data)
-        except AttributeError:
+    def get_technologies(self) -> typing.Optional[models.Technologies]:
+        texts = []
+        if experience := self.section("experience"):
+            for item in experience.items:
+                texts.extend([item.position, *fc.flatten([item.other])])
+        if about := self.section("about"):
+            texts.extend(fc.flatten([about.text]))
+        if skills := self.section("skills"):
+            texts.extend(skills.items)
+        if items := extract_skills(texts):
+            return self.build(models.Technologies, items=items)
+        return None
+
+    def get_section(self, attr_name: str, *data: list):
+        if (getter := getattr(self, f"get_{attr_name}", None)) is None:
             logger.error(f"No getter method for <{attr_name}> attribute found")
-
-    def get_resume(self) -> dict:
+            return None
+        with timed(f"get_{attr_name}"):
+            try:
+                return getter(*data)
+            except AttributeError:
+                # Getters expect the layout of hh.ru resumes, an unexpected paragraph only costs its section
+                logger.exception(f"Getter of <{attr_name}> section failed")
+                return None
+
+    def section(self, name: str) -> typing.Optional[models.Section]:
+        """Returns section model, parsing it on first access only"""
+        if name not in self.parsed:
+            if name in derived_sections:
+                self.parsed[name] = self.get_section(name)
+            elif name in self.sections:
+                # Getters consume raw paragraphs, so they get a copy
+                self.parsed[name] = self.get_section(name, list(self.sections[name]["raw"]))
+            else:
+                return None
+        return self.parsed[name]
+
+    def get_sections(self, sections: typing.Optional[typing.Iterable[str]] = None) -> typing.Dict[str, models.Section]:
+        """Returns resume as dict of section models, only the given sections are parsed if any"""
+        names = [*self.sections, *derived_sections]
+        wanted = set(names if sections is None else sections)
+        names = [name for name in names if name in wanted]
+        return {name: section for name in names if (section := self.section(name))}
+
+    def get_resume(self, sections: typing.Optional[typing.Iterable[str]] = None) -> dict:
         """Returns resume as dict of sections"""
-        resume = defaultdict()
-        for name, content in self.sections.items():
-            raw = content.get("raw")
-            if section := self.get_section(name, raw):
-                resume[name] = section.dict()
-        return resume
+        return {name: section.dict() for name, section in self.get_sections(sections).items()}
 
     def to_notion(self) -> dict:
-        f_sections = self.get_resume()
-        notion_page = NotionConverter(f_sections, self.template_lang).convert_resume()
-        return notion_page
+        return NotionConverter(self.get_sections(), self.template_lang).convert_resume()
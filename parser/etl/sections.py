@@ -0,0 +1,43 @@
+from collections import defaultdict
+
+import funcy as fc
+
+from parser.constants import SECTION_TITLE_MAX
+from .packs import packs
+
+
+class SectionDetector:
+    """
+    Classifies every paragraph against section titles of all template languages in one pass.
+    For each section only the last matching paragraph matters, so just its index is kept.
+    Indices are tracked both for raw paragraphs and for paragraphs left after "show more" filtering
+    """
+
+    def __init__(self, paragraphs: list):
+        self.last = {lang: {} for lang in packs}
+        self.last_visible = {lang: {} for lang in packs}
+        visible = dict.fromkeys(packs, 0)
+
+        for i, par in enumerate(paragraphs):
+            par_flat = fc.str_join(par)
+            is_short = len(par_flat) < SECTION_TITLE_MAX
+            for lang, pack in packs.items():
+                is_visible = pack.show_more not in par_flat
+                if is_short:
+                    for k, (_, pattern) in pack.sections_re.items():
+                        if pattern.search(par_flat):
+                            self.last[lang][k] = i
+                            if is_visible:
+                                self.last_visible[lang][k] = visible[lang]
+                visible[lang] += is_visible
+
+    def fetch(self, lang: str, visible: bool = False) -> dict:
+        """Returns sections presented in current resume"""
+        last = self.last_visible[lang] if visible else self.last[lang]
+        sections = defaultdict()
+        sections["general"] = {"title": "", "index": (curr_index := 0)}
+        for k, (title, _) in packs[lang].sections_re.items():
+            if (i := last.get(k, -1)) > curr_index:
+                sections[k] = {"title": title, "index": i}
+                curr_index = i
+        return sections
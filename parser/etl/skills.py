@@ -0,0 +1,91 @@
+import collections
+import functools
+import json
+import pathlib
+import re
+import typing
+
+SKILLS_PATH = pathlib.Path(__file__).parent.parent / "data" / "skills.json"
+space_re = re.compile(r"\s+")
+Output = typing.List[typing.Tuple[int, str]]  # (term length, value) of terms ending in a state
+
+
+def normalize(text: str) -> str:
+    return space_re.sub(" ", text.lower().replace("ё", "е"))
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton over a dictionary of terms: finds all of them in a text in one pass,
+    whatever the dictionary size
+    """
+
+    def __init__(self, terms: typing.Dict[str, str]):
+        self.goto: typing.List[typing.Dict[str, int]] = [{}]
+        self.fail: typing.List[int] = [0]
+        self.out: typing.List[Output] = [[]]
+        for term, value in terms.items():
+            self.add(normalize(term), value)
+        self.link()
+
+    def add(self, term: str, value: str):
+        state = 0
+        for char in term:
+            if (next_state := self.goto[state].get(char)) is None:
+                next_state = self.goto[state][char] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = next_state
+        self.out[state].append((len(term), value))
+
+    def link(self):
+        """Sets failure links breadth first, so every state also reports terms ending in its suffixes"""
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                self.out[next_state].extend(self.out[self.fail[next_state]])
+                queue.append(next_state)
+
+    def iter_matches(self, text: str) -> typing.Iterator[typing.Tuple[int, int, str]]:
+        """Yields (start, end, value) of every term in the text, including overlapping ones"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in out[state]:
+                yield i + 1 - length, i + 1, value
+
+
+def is_word(text: str, start: int, end: int) -> bool:
+    """Checks that a match is not a part of a longer word, so `java` isn't found in `javascript`"""
+    return not (start > 0 and text[start - 1].isalnum()) and not (end < len(text) and text[end].isalnum())
+
+
+@functools.lru_cache(maxsize=None)
+def get_automaton(path: pathlib.Path = SKILLS_PATH) -> Automaton:
+    """Compiles the dictionary of skills and their synonyms once per process"""
+    with open(path, encoding="utf-8") as f:
+        skills = json.load(f)
+    return Automaton({synonym: skill for skill, synonyms in skills.items() for synonym in synonyms})
+
+
+def extract_skills(texts: typing.Iterable[str]) -> typing.List[str]:
+    """Returns skills mentioned in texts, most frequent first. Overlapping matches keep the leftmost longest one"""
+    automaton, counts = get_automaton(), collections.Counter()
+    for text in texts:
+        text = normalize(text)
+        end_of_last = 0
+        matches = sorted(automaton.iter_matches(text), key=lambda m: (m[0], -m[1]))
+        for start, end, skill in matches:
+            if start >= end_of_last and is_word(text, start, end):
+                counts[skill] += 1
+                end_of_last = end
+    return [skill for skill, _ in counts.most_common()]
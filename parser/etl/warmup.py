@@ -0,0 +1,15 @@
+import importlib
+
+
+def warm_up():
+    """
+    Imports ResumeETL with its models and language packs and loads lazily initialised state,
+    so the first parsed resume doesn't pay for it. Called in parser workers, or once before forking them
+    """
+    from langdetect.detector_factory import init_factory
+
+    from .skills import get_automaton
+
+    importlib.import_module(".resume", __package__)
+    init_factory()
+    get_automaton()
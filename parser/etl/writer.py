@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import logging
+import time
+import typing
+
+import funcy as fc
+import httpx
+from notion_client import AsyncClient
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from config import NOTION_RETRIES, NOTION_RATE_LIMIT
+from parser.constants import NOTION_BLOCKS_MAX
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Errors worth repeating a request that changes nothing or changes it the same way again"""
+    if isinstance(error, HTTPResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (RequestTimeoutError, httpx.TransportError))
+
+
+def is_not_applied(error: Exception) -> bool:
+    """Errors that surely mean the request wasn't applied, so even a request creating something can be repeated"""
+    if isinstance(error, HTTPResponseError):
+        return error.status == 429
+    if isinstance(error, RequestTimeoutError):
+        error = error.__context__  # notion_client hides the httpx timeout, nothing was sent if it's a connect one
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart for all coroutines sharing it, 0 rate means no limit"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_at = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        at = max(self.next_at, now)
+        self.next_at = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+class NotionWriter:
+    """
+    Writes pages of any length: the page is created with the first chunk of blocks,
+    the rest are appended in chunks of NOTION_BLOCKS_MAX.
+    Notion always appends to the end, so chunks are sent one after another to keep their order
+    """
+
+    def __init__(
+        self, client: AsyncClient, retries: int = NOTION_RETRIES, backoff: float = 1.0, rate: float = NOTION_RATE_LIMIT
+    ):
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate)
+
+    async def backoff_delay(self, error: Exception, attempt: int):
+        delay = self.backoff * 2**attempt
+        if isinstance(error, HTTPResponseError) and (retry_after := error.headers.get("retry-after", "")).isdigit():
+            delay = max(delay, int(retry_after))
+        logger.warning(f"Notion request failed ({error}), retrying in {delay}s")
+        await asyncio.sleep(delay)
+
+    async def call(
+        self, method: typing.Callable, retryable: typing.Callable[[Exception], bool] = is_retryable, **kwargs
+    ) -> dict:
+        """
+        Calls Notion API method, retrying errors accepted by `retryable` with exponential backoff.
+        Requests that create something must only repeat errors that mean the request wasn't applied
+        """
+        for attempt in itertools.count():
+            await self.limiter.wait()
+            try:
+                return await method(**kwargs)
+            except Exception as e:
+                if attempt >= self.retries or not retryable(e):
+                    raise
+                await self.backoff_delay(e, attempt)
+
+    async def list_children(self, block_id: str) -> typing.List[str]:
+        block_ids, cursor = [], None
+        while True:
+            kwargs = {"start_cursor": cursor} if cursor else {}
+            children = await self.call(self.client.blocks.children.list, block_id=block_id, **kwargs)
+            block_ids.extend(block["id"] for block in children["results"])
+            if not (cursor := children.get("next_cursor")):
+                return block_ids
+
+    async def append_chunk(self, block_id: str, chunk: typing.List[dict], count: int):
+        """
+        Appends chunk to a block with `count` children. After a timeout or a server error the chunk
+        may have been appended anyway, so the children are counted before sending it again
+        """
+        for attempt in itertools.count():
+            try:
+                await self.call(
+                    self.client.blocks.children.append, retryable=is_not_applied, block_id=block_id, children=chunk
+                )
+                return
+            except Exception as e:
+                if attempt >= self.retries or not is_retryable(e):
+                    raise
+                await self.backoff_delay(e, attempt)
+                # Sent again only if the block still has as many children as before, a duplicate is worse than a gap
+                if len(await self.list_children(block_id)) != count:
+                    return
+
+    async def append(self, block_id: str, blocks: typing.Iterable[dict], count: int = 0):
+        """Appends blocks to a block with `count` children"""
+        for chunk in fc.chunks(NOTION_BLOCKS_MAX, blocks):
+            await self.append_chunk(block_id, chunk, count)
+            count += len(chunk)
+
+    async def create_page(self, parent_id: str, page: dict) -> dict:
+        blocks = iter(page["children"])
+        first = list(itertools.islice(blocks, NOTION_BLOCKS_MAX))
+        response = await self.call(
+            self.client.pages.create,
+            retryable=is_not_applied,
+            parent={"page_id": parent_id},
+            properties=page["properties"],
+            children=first,
+        )
+        await self.append(response["id"], blocks, len(first))
+        return response
+
+    async def update_page(self, page_id: str, page: dict) -> dict:
+        """
+        Replaces title and all blocks of an existing page. Notion has no batch delete, every old block
+        takes a request of the rate limit, so they are sent at once and only the limiter spaces them
+        """
+        response = await self.call(self.client.pages.update, page_id=page_id, properties=page["properties"])
+        block_ids = await self.list_children(page_id)  # Collect ids first, deleting shifts the cursor
+        await asyncio.gather(*[self.call(self.client.blocks.delete, block_id=block_id) for block_id in block_ids])
+        await self.append(page_id, page["children"])
+        return response
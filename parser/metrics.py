@@ -0,0 +1,162 @@
+import bisect
+import contextlib
+import contextvars
+import datetime
+import json
+import random
+import sqlite3
+import threading
+import time
+import typing
+
+from config import METRICS_PATH, METRICS_SPANS_SAMPLE_RATE
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SLOTS = len(BUCKETS) + 3  # Bucket counts, longer than the last bucket, sum, count
+
+
+class Registry:
+    """
+    In-process stage timings (histograms) and event counters.
+    Snapshots are plain dicts, so worker processes can send them to the server process
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: typing.Dict[str, list] = {}  # stage: [bucket counts..., +Inf count, sum, count]
+        self.counters: typing.Dict[str, int] = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            if (histogram := self.histograms.get(stage)) is None:
+                histogram = self.histograms[stage] = [0] * SLOTS
+            histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+    def inc(self, event: str, value: int = 1):
+        with self.lock:
+            self.counters[event] = self.counters.get(event, 0) + value
+
+    def drain(self) -> dict:
+        """Returns collected metrics and resets them"""
+        with self.lock:
+            snapshot = {"histograms": self.histograms, "counters": self.counters}
+            self.histograms, self.counters = {}, {}
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        with self.lock:
+            for stage, values in snapshot["histograms"].items():
+                histogram = self.histograms.setdefault(stage, [0] * SLOTS)
+                for i, value in enumerate(values):
+                    histogram[i] += value
+            for event, value in snapshot["counters"].items():
+                self.counters[event] = self.counters.get(event, 0) + value
+
+    def render(self) -> str:
+        """Returns metrics in Prometheus text format"""
+        lines = ["# TYPE parser_stage_seconds histogram"]
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for le, count in zip((*map(str, BUCKETS), "+Inf"), histogram[:-2]):
+                    cumulative += count
+                    lines.append(f'parser_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'parser_stage_seconds_sum{{stage="{stage}"}} {histogram[-2]}')
+                lines.append(f'parser_stage_seconds_count{{stage="{stage}"}} {histogram[-1]}')
+            lines.append("# TYPE parser_events_total counter")
+            lines.extend(f'parser_events_total{{event="{e}"}} {v}' for e, v in sorted(self.counters.items()))
+        return "\n".join(lines) + "\n"
+
+
+class MetricsStore:
+    """
+    Metrics of all server processes summed in a SQLite file. Every process adds what it has collected
+    since its last flush, so any process renders the same totals and they survive restarts of processes
+    """
+
+    def __init__(self, path: str = METRICS_PATH):
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, snapshot TEXT)")
+
+    def load(self) -> Registry:
+        total = Registry()
+        if row := self.db.execute("SELECT snapshot FROM metrics WHERE id = 0").fetchone():
+            total.merge(json.loads(row[0]))
+        return total
+
+    def add(self, snapshot: dict):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            total = self.load()
+            total.merge(snapshot)
+            self.db.execute("INSERT OR REPLACE INTO metrics (id, snapshot) VALUES (0, ?)", (json.dumps(total.drain()),))
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+
+registry = Registry()
+
+
+# Set while a stage runs in the parser pool, there is no request transaction to attach its spans to
+collected_spans: contextvars.ContextVar[typing.Optional[list]] = contextvars.ContextVar("collected_spans", default=None)
+
+
+@contextlib.contextmanager
+def timed(stage: str):
+    """
+    Records stage duration, also as a Sentry span for a sampled share of calls. Works as a decorator too.
+    In the parser pool spans are collected instead and created by the server process with add_spans
+    """
+    sampled = METRICS_SPANS_SAMPLE_RATE and random.random() < METRICS_SPANS_SAMPLE_RATE
+    collected, span = collected_spans.get(), None
+    if sampled and collected is None:
+        import sentry_sdk
+
+        span = sentry_sdk.start_span(op=stage)
+        span.__enter__()
+    started, start = time.time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        registry.observe(stage, seconds)
+        if span is not None:
+            span.__exit__(None, None, None)
+        elif sampled:
+            collected.append((stage, started, seconds))
+
+
+def with_spans(func: typing.Callable, *args) -> typing.Tuple[typing.Any, list]:
+    """Runs func in a parser thread and returns its result with (stage, start timestamp, seconds) of sampled spans"""
+    token = collected_spans.set([])
+    try:
+        return func(*args), collected_spans.get()
+    finally:
+        collected_spans.reset(token)
+
+
+def with_metrics(func: typing.Callable, *args) -> typing.Tuple[typing.Any, dict, list]:
+    """
+    Runs func in a worker process and returns its result with metrics collected there since the last call
+    (metrics of failed calls are sent with the next successful one) and its sampled spans
+    """
+    result, spans = with_spans(func, *args)
+    return result, registry.drain(), spans
+
+
+def add_spans(spans: list):
+    """Creates spans collected by with_spans as children of the current span, the one of the request"""
+    if not spans:
+        return
+    import sentry_sdk
+
+    for stage, started, seconds in spans:
+        # sentry-sdk 1.9 doesn't take timestamps, they are set on the span before it is sent with the transaction
+        span = sentry_sdk.start_span(op=stage)
+        span.start_timestamp = datetime.datetime.utcfromtimestamp(started)
+        span.timestamp = span.start_timestamp + datetime.timedelta(seconds=seconds)
@@ -14,8 +14,9 @@ from .resume import (
     Tests,
     Certificates,
     Citizenship,
+    Technologies,
 )
-from .resume import Resume
+from .resume import Resume, Section
 
 
 all_sections = {
@@ -8,11 +8,16 @@ from .utils import fix_paragraph
 
 
 class Title(BaseModel):
+    """Section title by template language, titles for languages other than ru and en go as extra fields"""
+
     searchable: bool = True
     exact: bool = True
     ru: str = ""
     en: str = ""
 
+    class Config:
+        extra = "allow"
+
 
 class Section(BaseModel):
     title: Title
@@ -23,7 +28,7 @@ class Section(BaseModel):
     def re(cls, lang: str) -> Optional[dict]:
         d_title = cls.__fields__["title"].default.dict()
         d_length = cls.__fields__["min_length"].default
-        if d_title["searchable"]:
+        if d_title["searchable"] and d_title.get(lang):
             return {"title": f"^{d_title[lang]}$" if d_title["exact"] else d_title[lang], "min_length": d_length}
         return None
 
@@ -181,6 +186,11 @@ class Citizenship(Section):
     commute: Optional[str]
 
 
+class Technologies(Section):
+    title = Title(ru="Технологии", en="Technologies", searchable=False)
+    items: List[str]
+
+
 class Resume(BaseModel):
     general = General
     contacts = Contacts
@@ -197,3 +207,4 @@ class Resume(BaseModel):
     tests = Tests
     certificates = Certificates
     citizenship = Citizenship
+    technologies = Technologies
@@ -1,27 +1,37 @@
-from funcy import with_next
+import functools
+from typing import Callable, Dict, List, Type
+
+from pydantic import BaseModel
+
+from parser.normalize import merge_fragments
 
 
 def fix_paragraph(paragraph: list):
     """Fixes <highlighted> words in paragraph"""
-    paragraph = paragraph.copy()
-    while True:
-        new_paragraph = []
-        skip = False
-        for w, next_w in with_next(paragraph, fill=""):
-            if skip:
-                skip = False
-                continue
-            if w.endswith(" "):
-                new_paragraph.append(f"{w}{next_w}")
-                skip = True
-            elif next_w.startswith(" ") or next_w.startswith(","):
-                new_paragraph.append(f"{w}{next_w}")
-                skip = True
-            else:
-                new_paragraph.append(w)
-        if paragraph != new_paragraph:
-            paragraph = new_paragraph.copy()
-        else:
-            break
-
-    return paragraph[0] if len(paragraph) == 1 else paragraph
+    return merge_fragments(paragraph)
+
+
+@functools.lru_cache(maxsize=None)
+def pre_validators(model: Type[BaseModel]) -> Dict[str, List[Callable]]:
+    return {
+        name: [v.func for v in field.class_validators.values() if v.pre]
+        for name, field in model.__fields__.items()
+        if any(v.pre for v in field.class_validators.values())
+    }
+
+
+def build(model: Type[BaseModel], trusted: bool = False, **values) -> BaseModel:
+    """
+    Returns validated model, or, for trusted input, a model constructed without validation.
+    Pre validators are still applied as they normalize raw text, and digit strings are cast to int fields
+    """
+    if not trusted:
+        return model(**values)
+    for name, validators in pre_validators(model).items():
+        if name in values:
+            for validator in validators:
+                values[name] = validator(model, values[name])
+    for name, value in values.items():
+        if isinstance(value, str) and model.__fields__[name].outer_type_ is int:
+            values[name] = int(value)
+    return model.construct(**values)
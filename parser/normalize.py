@@ -0,0 +1,51 @@
+"""
+Single-pass text normalization.
+Merged fragments are kept on a stack together with the few properties merging depends on,
+so every fragment is pushed, compared and joined once
+"""
+
+import typing
+
+
+def join_groups(fragments: list, starts: list) -> typing.Union[list, str]:
+    """Joins fragments into groups beginning at starts"""
+    merged = ["".join(fragments[i:j]) for i, j in zip(starts, [*starts[1:], len(fragments)])]
+    return merged[0] if len(merged) == 1 else merged
+
+
+def merge_fragments(paragraph: list) -> typing.Union[list, str]:
+    """
+    Merges <highlighted> word fragments: neighbours are joined if the left one ends with a space
+    or the right one starts with a space / comma
+    """
+    if all(paragraph):  # Without empty fragments a border depends only on the fragments around it
+        starts = [0] if paragraph else []
+        for i, (left, right) in enumerate(zip(paragraph, paragraph[1:]), 1):
+            if not (left.endswith(" ") or right.startswith((" ", ","))):
+                starts.append(i)
+        return join_groups(paragraph, starts)
+
+    groups = []  # [start index, first char, last char] of merged fragments
+    for i, fragment in enumerate(paragraph):
+        groups.append([i, fragment[:1], fragment[-1:]])
+        while len(groups) > 1 and (groups[-2][2] == " " or groups[-1][1] in (" ", ",")):
+            _, first, last = groups.pop()
+            groups[-1][1] = groups[-1][1] or first
+            groups[-1][2] = last or groups[-1][2]
+    return join_groups(paragraph, [start for start, *_ in groups])
+
+
+def merge_short(text: list, threshold: int) -> typing.Union[list, str]:
+    """Merges neighbouring fragments while any of the two has less than threshold words"""
+    groups = []  # [start index, word count, first char, last char] of merged fragments
+    for i, fragment in enumerate(text):
+        groups.append([i, len(fragment.split()), fragment[:1], fragment[-1:]])
+        while len(groups) > 1 and (groups[-1][1] < threshold or groups[-2][1] < threshold):
+            _, words, first, last = groups.pop()
+            left = groups[-1]
+            if left[3] and first and not left[3].isspace() and not first.isspace():
+                words -= 1  # Words on both sides of the border stick together
+            left[1] += words
+            left[2] = left[2] or first
+            left[3] = last or left[3]
+    return join_groups(text, [start for start, *_ in groups])
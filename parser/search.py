@@ -0,0 +1,102 @@
+import re
+import sqlite3
+import time
+import typing
+
+from config import SEARCH_PATH
+
+word_re = re.compile(r"[\w+#.-]+\*?")
+# Column weights for bm25, in the order of documents_fts columns
+weights = {"position": 4.0, "skills": 3.0, "experience": 2.0, "languages": 1.0, "location": 1.0}
+columns = ", ".join(weights)
+create_documents = (
+    "CREATE TABLE IF NOT EXISTS documents "
+    + "(id INTEGER PRIMARY KEY, source TEXT UNIQUE, name TEXT, url TEXT, indexed REAL)"
+)
+create_fts = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5({columns}, "
+    + "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+insert_fts = f"INSERT INTO documents_fts (rowid, {columns}) VALUES (?{', ?' * len(weights)})"
+select_matches = (
+    f"SELECT d.source, d.name, d.url, bm25(documents_fts, {', '.join(map(str, weights.values()))}) AS rank "
+    + "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+    + "WHERE documents_fts MATCH ? ORDER BY rank LIMIT ?"
+)
+Record = typing.Tuple[str, dict, typing.Optional[str]]  # source, resume, url
+
+
+def get_fields(resume: dict) -> dict:
+    """Returns searchable text of a get_resume() result (or its JSON) by FTS column"""
+    experience = resume.get("experience", {}).get("items") or []
+    return {
+        "position": resume.get("position", {}).get("name") or "",
+        "skills": "\n".join(
+            item for section in ("skills", "technologies") for item in resume.get(section, {}).get("items") or []
+        ),
+        "experience": "\n".join(f"{i.get('position') or ''}\n{i.get('company') or ''}" for i in experience),
+        "languages": "\n".join(
+            f"{i['name']} {i.get('lvl') or ''}" for i in resume.get("languages", {}).get("items") or []
+        ),
+        "location": resume.get("contacts", {}).get("location") or "",
+    }
+
+
+def to_match(query: str) -> str:
+    """Turns free text into FTS5 query: every word must match, `word*` matches a prefix"""
+    terms = []
+    for word in word_re.findall(query):
+        prefix = word.endswith("*")
+        if word := word.rstrip("*").replace('"', ""):
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """
+    Full-text index of parsed resumes in SQLite FTS5, one document per source (file path or content key).
+    Results are ranked by bm25 with position and skills weighted above the rest
+    """
+
+    def __init__(self, path: str = SEARCH_PATH):
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(create_documents)
+        self.db.execute(create_fts)
+
+    def add_many(self, records: typing.Iterable[Record]) -> int:
+        """Indexes (source, resume, url) records in one transaction, replacing documents of known sources"""
+        count, now = 0, time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for source, resume, url in records:
+                name = resume.get("general", {}).get("name")
+                if row := self.db.execute("SELECT id FROM documents WHERE source = ?", (source,)).fetchone():
+                    doc_id = row[0]
+                    self.db.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+                    self.db.execute(
+                        "UPDATE documents SET name = ?, url = ?, indexed = ? WHERE id = ?", (name, url, now, doc_id)
+                    )
+                else:
+                    doc_id = self.db.execute(
+                        "INSERT INTO documents (source, name, url, indexed) VALUES (?, ?, ?, ?)",
+                        (source, name, url, now),
+                    ).lastrowid
+                fields = get_fields(resume)
+                self.db.execute(insert_fts, (doc_id, *(fields[column] for column in weights)))
+                count += 1
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        return count
+
+    def add(self, source: str, resume: dict, url: typing.Optional[str] = None):
+        self.add_many([(source, resume, url)])
+
+    def search(self, query: str, limit: int = 20) -> typing.List[dict]:
+        """Returns best matching candidates first"""
+        if not (match := to_match(query)):
+            return []
+        rows = self.db.execute(select_matches, (match, limit))
+        return [{"source": source, "name": name, "url": url, "rank": rank} for source, name, url, rank in rows]
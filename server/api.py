@@ -1,37 +1,293 @@
-import io
-from typing import Optional
+import asyncio
+from typing import IO, List, Optional, Union
 
-import httpx
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from notion_client import AsyncClient
+from pydantic import BaseModel, Field
 
-from config import TG_TOKEN, NOTION_TOKEN, NOTION_PAGE_ID
-from parser.etl import ResumeETL
+from config import (
+    TG_TOKEN,
+    NOTION_TOKEN,
+    NOTION_PAGE_ID,
+    NOTION_RATE_LIMIT,
+    PARSER_WORKERS,
+    PARSER_QUEUE_SIZE,
+    DOWNLOAD_MAX_SIZE,
+    UPLOAD_SPOOL_SIZE,
+    JOB_WORKERS,
+    JOB_QUEUE_SIZE,
+    JOB_HISTORY,
+    JOB_PATH,
+    METRICS_PATH,
+    METRICS_FLUSH_INTERVAL,
+    BATCH_MAX_URLS,
+    BATCH_DOWNLOADS,
+    DEDUP_PATH,
+    DEDUP_UPDATE,
+    SEARCH_PATH,
+    WEB_CONCURRENCY,
+    DocumentSizeError,
+    init_sentry,
+    setup_logging,
+)
+from parser.cache import ResultCache, cache_key, file_key, parse
+from parser.dedup import CandidateIndex, fingerprints
+from parser.etl.writer import NotionWriter
+from parser.metrics import MetricsStore, registry, timed
+from parser.search import SearchIndex
+from server.clients import DownloadError, download, make_client
+from server.jobs import Job, JobQueue, QueueFullError
+from server.pool import ParserPool, PoolSaturatedError
+from server.uploads import UploadError, read_upload
 
+setup_logging()
+init_sentry()
 app = FastAPI()
-notion = AsyncClient(auth=NOTION_TOKEN)
+notion = AsyncClient(auth=NOTION_TOKEN, client=make_client())
+# Every server process gets its share of the limit, Notion counts requests of the integration
+writer = NotionWriter(notion, rate=NOTION_RATE_LIMIT / WEB_CONCURRENCY)
+pool = ParserPool(PARSER_WORKERS, PARSER_QUEUE_SIZE)
+# SQLite connections must not be shared by forked processes, so they are opened on startup of every server worker
+cache: Optional[ResultCache] = None
+candidates: Optional[CandidateIndex] = None
+search_index: Optional[SearchIndex] = None
+metrics_store: Optional[MetricsStore] = None
+flusher: Optional[asyncio.Task] = None
+tg_client = make_client()
+download_client = make_client()
 
 
-async def send_tg_message(message: str, chat_id: int):
+@app.on_event("startup")
+async def startup():
+    global cache, candidates, search_index, metrics_store, flusher
+    cache = ResultCache()
+    candidates = CandidateIndex() if DEDUP_PATH else None
+    search_index = SearchIndex() if SEARCH_PATH else None
+    if METRICS_PATH:
+        metrics_store = MetricsStore()
+        flusher = asyncio.create_task(flush_metrics())
+    await pool.start()
+    await jobs.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await jobs.stop()
+    pool.shutdown()
+    await tg_client.aclose()
+    await download_client.aclose()
+    await notion.aclose()
+    if metrics_store is not None:
+        flusher.cancel()
+        metrics_store.add(registry.drain())
+
+
+async def flush_metrics():
+    """Adds metrics of this server process to the shared ones now and then, so a scrape of any process sees them"""
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        metrics_store.add(registry.drain())
+
+
+async def send_tg_message(message: str, chat_id: Optional[int]):
+    if chat_id is None:
+        return
     api_url = f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage"
-    async with httpx.AsyncClient() as client:
-        await client.post(api_url, json={"chat_id": chat_id, "text": message, "parse_mode": "Markdown"})
+    await tg_client.post(api_url, json={"chat_id": chat_id, "text": message, "parse_mode": "Markdown"})
+
+
+async def get_file(url: str) -> bytearray:
+    with timed("download"):
+        return await download(download_client, url, DOWNLOAD_MAX_SIZE)
+
+
+def busy() -> HTTPException:
+    registry.inc("rejected")
+    return HTTPException(status_code=503, detail="Parser is busy", headers={"Retry-After": "5"})
+
+
+def too_large(error: DocumentSizeError) -> HTTPException:
+    registry.inc("too_large")
+    return HTTPException(status_code=413, detail=str(error))
+
+
+def pool_input(resp: Union[bytes, bytearray, IO[bytes]]) -> Union[bytes, bytearray, str, IO[bytes]]:
+    """
+    A thread reads a file in place. A worker process opens a file spooled to disk by its name
+    and gets a small one kept in memory as bytes
+    """
+    if pool.in_process or isinstance(resp, (bytes, bytearray)):
+        return resp
+    return resp.name if isinstance(getattr(resp, "name", None), str) else resp.read()
+
+
+async def write_resume(resp: Union[bytes, bytearray, IO[bytes]], wait: bool = False) -> str:
+    """
+    Parses downloaded or uploaded file (or takes the cached result) and creates Notion page, returns its url.
+    With wait the file waits for the saturated pool instead of failing with PoolSaturatedError
+    """
+    # Hashing releases the GIL, so a file of several megabytes doesn't hold the event loop
+    key = await asyncio.to_thread(cache_key if isinstance(resp, (bytes, bytearray)) else file_key, resp)
+    if (result := cache.get(key)) is None or "notion" not in result:  # The CLI caches results without the page
+        registry.inc("cache_miss")
+        result = await pool.run(parse, pool_input(resp), wait=wait)
+        cache.set(key, result)
+    else:
+        registry.inc("cache_hit")
+    url = await write_page(result)
+    if search_index is not None:
+        search_index.add(key.split(":")[-1], result["resume"], url)  # Content hash, the same for all parser versions
+    return url
+
+
+async def write_page(result: dict) -> str:
+    """Creates Notion page, for an already known candidate returns (and with DEDUP_UPDATE rewrites) their page"""
+    keys = fingerprints(result["resume"].get("contacts")) if candidates else []
+    if keys and (known := candidates.find(keys)):
+        registry.inc("duplicate")
+        if DEDUP_UPDATE:
+            with timed("notion"):
+                await writer.update_page(known["page_id"], result["notion"])
+        candidates.add(keys, known["page_id"], known["url"])  # Links new phones and emails to the page
+        return known["url"]
+    with timed("notion"):
+        notion_resp = await writer.create_page(NOTION_PAGE_ID, result["notion"])
+    if keys:
+        candidates.add(keys, notion_resp["id"], notion_resp.get("url"))
+    return notion_resp.get("url", "Notion Error")
+
+
+async def run_job(job: Job) -> str:
+    try:
+        api_resp = await write_resume(await get_file(job.url), wait=True)
+    except Exception as e:
+        if not isinstance(e, DownloadError):
+            registry.inc("resume_error")
+        await send_tg_message(str(e), job.chat_id)
+        raise
+    registry.inc("resume_ok")
+    await send_tg_message(api_resp, job.chat_id)
+    return api_resp
+
+
+jobs = JobQueue(run_job, JOB_WORKERS, JOB_QUEUE_SIZE, JOB_PATH, JOB_HISTORY)
 
 
-async def get_file(url: str) -> bytes:
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        return response.content
+class JobRequest(BaseModel):
+    url: str
+    chat_id: Optional[int] = None
+
+
+class BatchRequest(BaseModel):
+    urls: List[str] = Field(..., min_items=1, max_items=BATCH_MAX_URLS)
+    chat_id: Optional[int] = None
+
+
+async def convert_url(url: str, slots: asyncio.Semaphore) -> dict:
+    try:
+        async with slots:  # Held until the file is parsed and written, so only that many files are kept in memory
+            page = await write_resume(await get_file(url), wait=True)
+    except DownloadError as e:
+        return {"url": url, "error": str(e)}
+    except Exception as e:
+        registry.inc("resume_error")
+        return {"url": url, "error": str(e)}
+    registry.inc("resume_ok")
+    return {"url": url, "page": page}
 
 
 @app.get("/")
 async def convert(url: Optional[str], chat_id: Optional[int]):
-    resp = await get_file(url)
-    extractor = ResumeETL(file=io.BytesIO(resp))
+    if pool.saturated:
+        raise busy()
     try:
-        resume = extractor.to_notion()
-        notion_resp = await notion.pages.create(parent={"page_id": NOTION_PAGE_ID}, **resume)
-        api_resp = notion_resp.get("url", "Notion Error")
+        resp = await get_file(url)
+    except DownloadError as e:
+        await send_tg_message(str(e), chat_id)
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        api_resp = await write_resume(resp)
+        registry.inc("resume_ok")
+    except PoolSaturatedError:
+        raise busy()
+    except DocumentSizeError as e:
+        await send_tg_message(str(e), chat_id)
+        raise too_large(e)
     except Exception as e:
+        registry.inc("resume_error")
         api_resp = str(e)
     await send_tg_message(api_resp, chat_id)
+
+
+@app.post("/upload")
+async def upload(request: Request, chat_id: Optional[int] = None):
+    """Parses DOCX or HTML sent as multipart form field `file` or as raw request body"""
+    if pool.saturated:
+        raise busy()
+    try:
+        file = await read_upload(request, DOWNLOAD_MAX_SIZE, UPLOAD_SPOOL_SIZE)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        api_resp = await write_resume(file)
+        registry.inc("resume_ok")
+    except PoolSaturatedError:
+        raise busy()
+    except DocumentSizeError as e:
+        await send_tg_message(str(e), chat_id)
+        raise too_large(e)
+    except Exception as e:
+        registry.inc("resume_error")
+        await send_tg_message(str(e), chat_id)
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        file.close()
+    await send_tg_message(api_resp, chat_id)
+    return {"url": api_resp}
+
+
+@app.post("/batch")
+async def convert_batch(request: BatchRequest):
+    """Converts several resumes at once and sends one Telegram message with all results"""
+    if pool.saturated:
+        raise busy()
+    slots = asyncio.Semaphore(BATCH_DOWNLOADS)
+    results = await asyncio.gather(*[convert_url(url, slots) for url in request.urls])
+    converted = sum("page" in r for r in results)
+    lines = [r.get("page") or f"{r['url']}: {r['error']}" for r in results]
+    await send_tg_message("\n".join([f"Converted {converted} of {len(results)}", *lines]), request.chat_id)
+    return {"converted": converted, "failed": len(results) - converted, "results": results}
+
+
+@app.post("/jobs", status_code=202, response_model=Job)
+async def create_job(request: JobRequest):
+    """Queues resume for parsing, the result is sent to Telegram and kept for status requests"""
+    try:
+        return jobs.submit(request.url, request.chat_id)
+    except QueueFullError:
+        raise busy()
+
+
+@app.get("/jobs/{job_id}", response_model=Job)  # noqa: FS003
+async def get_job(job_id: str):
+    if (job := jobs.get(job_id)) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/search")
+async def search(q: str, limit: int = 20):
+    """Returns best matching candidates first, `word*` matches a prefix"""
+    if search_index is None:
+        raise HTTPException(status_code=404, detail="Search is disabled")
+    return search_index.search(q, min(limit, 100))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics of all server processes, on the event loop like the flushes, so they don't share the connection"""
+    if metrics_store is None:
+        return registry.render()
+    metrics_store.add(registry.drain())
+    return metrics_store.load().render()
@@ -0,0 +1,74 @@
+import functools
+import ssl
+
+import httpx
+
+from config import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_TIMEOUT
+from parser.constants import SNIFF_SIZE
+from parser.converters import sniff
+
+CONTENT_TYPES = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/octet-stream",
+    "application/zip",
+    "text/html",
+)
+
+
+class DownloadError(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def ssl_context() -> ssl.SSLContext:
+    """Loading CA certificates takes tens of milliseconds, so all clients share one context"""
+    return httpx.create_ssl_context()
+
+
+def make_client() -> httpx.AsyncClient:
+    """Returns a client with a keep-alive connection pool, meant to live as long as the app"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+        verify=ssl_context(),
+    )
+
+
+async def download(client: httpx.AsyncClient, url: str, max_size: int) -> bytearray:
+    """Streams a DOCX or HTML file, rejecting it as soon as the type or the size is wrong"""
+    try:
+        return await fetch(client, url, max_size)
+    except httpx.HTTPError as e:
+        raise DownloadError(f"Download failed: {e}")
+
+
+def check_response(response: httpx.Response, max_size: int):
+    """Rejects a response by its status and headers before the body is read"""
+    if response.status_code != 200:
+        raise DownloadError(f"Download failed with status {response.status_code}")
+    content_type = response.headers.get("content-type", "").split(";")[0].strip()
+    if content_type and content_type not in CONTENT_TYPES:
+        raise DownloadError(f"Unsupported content type: {content_type}")
+    try:
+        content_length = int(response.headers.get("content-length", 0))
+    except ValueError:
+        raise DownloadError("Invalid Content-Length")
+    if content_length > max_size:
+        raise DownloadError("File is too large")
+
+
+async def fetch(client: httpx.AsyncClient, url: str, max_size: int) -> bytearray:
+    async with client.stream("GET", url) as response:
+        check_response(response, max_size)
+        data = bytearray()
+        async for chunk in response.aiter_bytes():
+            is_head = len(data) < SNIFF_SIZE
+            data += chunk
+            if is_head and len(data) >= SNIFF_SIZE and not sniff(data[:SNIFF_SIZE]):
+                raise DownloadError("File is not a DOCX or HTML document")
+            if len(data) > max_size:
+                raise DownloadError("File is too large")
+        if not sniff(data[:SNIFF_SIZE]):
+            raise DownloadError("File is not a DOCX or HTML document")
+        return data
@@ -0,0 +1,167 @@
+import asyncio
+import contextlib
+import logging
+import sqlite3
+import time
+import typing
+import uuid
+
+from pydantic import BaseModel, Field
+
+from config import JOB_HISTORY, JOB_PATH, JOB_POLL_INTERVAL, JOB_STOP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job(BaseModel):
+    job_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    url: str
+    chat_id: typing.Optional[int] = None
+    status: str = "queued"  # queued, running, done, failed
+    result: typing.Optional[str] = None
+    error: typing.Optional[str] = None
+    created: float = Field(default_factory=time.time)
+    finished: typing.Optional[float] = None
+
+
+class JobStore:
+    """
+    Jobs kept in a SQLite file, so any server process can tell about a job queued by another
+    and take up jobs left queued by a stopped one. Only the last `history` finished jobs are kept.
+    With ":memory:" path jobs are only known to the same process
+    """
+
+    def __init__(self, path: str = JOB_PATH, history: int = JOB_HISTORY):
+        self.history = history
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs "
+            + "(job_id TEXT PRIMARY KEY, job TEXT, status TEXT, created REAL, finished REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished)")
+
+    def save(self, job: Job):
+        self.db.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, job, status, created, finished) VALUES (?, ?, ?, ?, ?)",
+            (job.job_id, job.json(), job.status, job.created, job.finished),
+        )
+        if job.finished is not None:
+            self.db.execute(
+                "DELETE FROM jobs WHERE job_id IN "
+                + "(SELECT job_id FROM jobs WHERE finished IS NOT NULL ORDER BY finished DESC LIMIT -1 OFFSET ?)",
+                (self.history,),
+            )
+
+    def get(self, job_id: str) -> typing.Optional[Job]:
+        row = self.db.execute("SELECT job FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return Job.parse_raw(row[0]) if row else None
+
+    def queued(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def claim(self) -> typing.Optional[Job]:
+        """Marks the oldest queued job as running and returns it, one transaction so no other process takes it"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT job FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            job = None
+            if row:
+                job = Job.parse_raw(row[0])
+                job.status = "running"
+                self.save(job)
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        return job
+
+
+class JobQueue:
+    """
+    Queue of jobs in JobStore drained by `workers` tasks of every server process running `handler`.
+    At most `queue_size` jobs wait at once, the rest are rejected with QueueFullError.
+    A job submitted to this process wakes its tasks, jobs left by a stopped process are found every `poll_interval`.
+    The store is opened on start, a SQLite connection must not be inherited by forked server processes
+    """
+
+    def __init__(
+        self,
+        handler: typing.Callable[[Job], typing.Awaitable[str]],
+        workers: int,
+        queue_size: int,
+        path: str = JOB_PATH,
+        history: int = JOB_HISTORY,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ):
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.queue_size = queue_size
+        self.path = path
+        self.history = history
+        self.poll_interval = poll_interval
+        self.store: typing.Optional[JobStore] = None
+        self.submitted = asyncio.Event()
+        self.stopping = False
+        self.tasks: typing.List[asyncio.Task] = []
+
+    async def start(self):
+        self.store = JobStore(self.path, self.history)
+        self.stopping = False
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = JOB_STOP_TIMEOUT):
+        """
+        Lets running jobs finish within timeout and cancels the rest of them.
+        Jobs that haven't started stay queued for other server processes
+        """
+        self.stopping = True
+        self.submitted.set()
+        if self.tasks:
+            _, running = await asyncio.wait(self.tasks, timeout=timeout)
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, url: str, chat_id: typing.Optional[int] = None) -> Job:
+        if self.store.queued() >= self.queue_size:
+            raise QueueFullError
+        job = Job(url=url, chat_id=chat_id)
+        self.store.save(job)
+        self.submitted.set()
+        return job
+
+    def get(self, job_id: str) -> typing.Optional[Job]:
+        return self.store.get(job_id)
+
+    def finish(self, job: Job, result: typing.Optional[str] = None, error: typing.Optional[str] = None):
+        job.status = "failed" if error is not None else "done"
+        job.result, job.error, job.finished = result, error, time.time()
+        self.store.save(job)
+
+    async def next_job(self) -> typing.Optional[Job]:
+        """Returns a job to run, None once the queue is stopping"""
+        while not self.stopping:
+            self.submitted.clear()  # Before claiming, so a job submitted meanwhile isn't missed
+            if job := self.store.claim():
+                return job
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.submitted.wait(), self.poll_interval)
+        return None
+
+    async def work(self):
+        while job := await self.next_job():
+            try:
+                self.finish(job, result=await self.handler(job))
+            except asyncio.CancelledError:
+                self.finish(job, error="Server stopped before the job finished")
+                raise
+            except Exception as e:
+                logger.exception(f"Job {job.job_id} failed")
+                self.finish(job, error=str(e))
@@ -0,0 +1,92 @@
+import asyncio
+import typing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from parser.etl import warm_up
+from parser.metrics import add_spans, registry, with_metrics, with_spans
+
+
+class PoolSaturatedError(Exception):
+    pass
+
+
+def init_worker():
+    registry.drain()  # A forked worker starts with a copy of the server's metrics, they must not be sent back
+    warm_up()
+
+
+class ParserPool:
+    """
+    Runs CPU-bound parsing off the event loop.
+    At most `workers + queue_size` tasks are accepted at once, the rest are rejected with PoolSaturatedError
+    or, if they are to wait, get the next free slot in turn.
+    With 0 workers tasks run in a single thread of the server process.
+    The executor is created on start, so the pool can be made in a process that forks server workers later.
+    A worker killed by a crash or out of memory breaks the whole executor, it is replaced then
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(workers, 1)
+        self.limit = self.workers + queue_size
+        self.pending = 0
+        self.in_process = workers == 0
+        self.executor: typing.Optional[Executor] = None
+        self.freed = asyncio.Condition()
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.limit
+
+    def make_executor(self) -> Executor:
+        if self.in_process:
+            return ThreadPoolExecutor(max_workers=1, initializer=warm_up)
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+
+    async def warm(self):
+        """Spawns all workers and waits until their language profiles are loaded"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor, int) for _ in range(self.workers)])
+
+    async def start(self):
+        self.executor = self.make_executor()
+        await self.warm()
+
+    async def restart(self, broken: Executor):
+        """Replaces the broken executor, once for all tasks that failed with it"""
+        if self.executor is not broken:
+            return
+        registry.inc("pool_restart")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.executor = self.make_executor()
+        await self.warm()
+
+    async def run(self, func, *args, wait: bool = False):
+        if self.saturated:
+            if not wait:
+                raise PoolSaturatedError
+            async with self.freed:
+                await self.freed.wait_for(lambda: not self.saturated)
+        self.pending += 1
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            if self.in_process:
+                result, spans = await loop.run_in_executor(executor, with_spans, func, *args)
+            else:
+                result, metrics, spans = await loop.run_in_executor(executor, with_metrics, func, *args)
+                registry.merge(metrics)
+            add_spans(spans)  # Here the request's transaction is current
+            return result
+        except BrokenProcessPool:
+            # The task is not retried, it may be the one that crashed the worker
+            await self.restart(executor)
+            raise
+        finally:
+            self.pending -= 1
+            async with self.freed:
+                self.freed.notify()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
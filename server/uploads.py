@@ -0,0 +1,116 @@
+import asyncio
+import io
+import shutil
+import tempfile
+import typing
+
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.requests import Request
+
+from parser.constants import FORM_OVERHEAD, SNIFF_SIZE
+from parser.converters import sniff
+
+
+class UploadError(Exception):
+    pass
+
+
+def unspool(file: typing.IO[bytes]) -> typing.IO[bytes]:
+    """
+    Before Python 3.11 SpooledTemporaryFile is not io.IOBase and zipfile can't open it,
+    so the file under it (BytesIO or a temporary file) is read in place
+    """
+    if isinstance(file, tempfile.SpooledTemporaryFile) and not isinstance(file, io.IOBase):
+        return file._file  # noqa: SF01
+    return file
+
+
+def check_file(file: typing.IO[bytes], max_size: int):
+    if file.seek(0, 2) > max_size:
+        raise UploadError("File is too large")
+    file.seek(0)
+    if not sniff(file.read(SNIFF_SIZE)):
+        raise UploadError("File is not a DOCX or HTML document")
+    file.seek(0)
+
+
+async def limit(stream: typing.AsyncIterator[bytes], max_size: int) -> typing.AsyncGenerator[bytes, None]:
+    """Passes a stream through, failing as soon as it gets longer than max_size whatever Content-Length says"""
+    size = 0
+    async for chunk in stream:
+        size += len(chunk)
+        if size > max_size:
+            raise UploadError("File is too large")
+        yield chunk
+
+
+async def spool(stream: typing.AsyncIterator[bytes], max_size: int, spool_size: int) -> typing.IO[bytes]:
+    """
+    Writes a stream to memory up to spool_size bytes and to a named temporary file after that,
+    so a parser process can open it by name. The stream is rejected as soon as the size is wrong
+    """
+    file: typing.IO[bytes] = io.BytesIO()
+    try:
+        async for chunk in limit(stream, max_size):
+            if isinstance(file, io.BytesIO) and file.tell() + len(chunk) > spool_size:
+                file = to_disk(file)
+            file.write(chunk)
+        check_file(file, max_size)
+    except BaseException:
+        file.close()
+        raise
+    return file
+
+
+def to_disk(memory: io.BytesIO) -> typing.IO[bytes]:
+    file = tempfile.NamedTemporaryFile()
+    file.write(memory.getvalue())
+    memory.close()
+    return file
+
+
+async def named_copy(file: typing.IO[bytes]) -> typing.IO[bytes]:
+    """Copies a file spooled to an unnamed temporary file, in a thread as it is on disk"""
+    copy = tempfile.NamedTemporaryFile()
+    try:
+        await asyncio.to_thread(shutil.copyfileobj, file, copy)
+    except BaseException:
+        copy.close()
+        raise
+    copy.seek(0)
+    return copy
+
+
+async def read_upload(request: Request, max_size: int, spool_size: int) -> typing.IO[bytes]:
+    """Returns DOCX or HTML file sent as the `file` field of a multipart form or as the raw request body"""
+    multipart = request.headers.get("content-type", "").startswith("multipart/form-data")
+    body_size = max_size + FORM_OVERHEAD if multipart else max_size
+    try:
+        content_length = int(request.headers.get("content-length", 0))
+    except ValueError:
+        raise UploadError("Invalid Content-Length")
+    if content_length > body_size:
+        raise UploadError("File is too large")
+    if not multipart:
+        return await spool(request.stream(), max_size, spool_size)
+
+    # Files are spooled by the form parser. A chunked body has no Content-Length, so it is counted as it comes
+    try:
+        form = await MultiPartParser(request.headers, limit(request.stream(), body_size)).parse()
+    except MultiPartException as e:
+        raise UploadError(e.message)
+    if not isinstance(upload := form.get("file"), UploadFile):
+        await form.close()
+        raise UploadError("No file in the form")
+    try:
+        check_file(upload.file, max_size)
+        if not upload.file._rolled:  # noqa: SF01
+            return unspool(upload.file)
+        # The form parser spools large files to unnamed temporary files, parser processes need a name to open it
+        copy = await named_copy(upload.file)
+    except BaseException:
+        await form.close()
+        raise
+    await form.close()
+    return copy
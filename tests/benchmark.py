@@ -0,0 +1,156 @@
+"""
+Times every parsing stage on generated resumes of several sizes.
+
+    python -m tests.benchmark -o bench.json
+    python -m tests.benchmark --compare bench.json
+
+With --compare exits with 1 if any stage got slower than the baseline by more than --threshold
+"""
+
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import typing
+import zipfile
+
+from parser import __version__
+from parser.converters.docx import iter_xml_paragraphs, normalize_text
+from parser.etl import ResumeETL, warm_up
+from parser.etl.fields import FieldsExtractor
+from parser.etl.notion import NotionConverter
+from parser.etl.packs import packs
+from parser.etl.sections import SectionDetector
+from parser.models.utils import fix_paragraph
+from tests.generator import generate_bytes
+
+sizes = {
+    "small": {"jobs": 3, "education": 1, "paragraph_words": 20},
+    "medium": {"jobs": 15, "education": 3, "paragraph_words": 80},
+    "large": {"jobs": 60, "education": 6, "paragraph_words": 300},
+}
+
+
+def run_stages(data: bytes) -> typing.Dict[str, float]:
+    """Runs ResumeETL step by step, returns seconds spent in each stage"""
+    timings = {}
+
+    def timed(stage: str, func: typing.Callable, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    def unzip():
+        with zipfile.ZipFile(io.BytesIO(data)) as doc:
+            return doc.read("word/document.xml")
+
+    xml_content = timed("unzip", unzip)
+    etl = ResumeETL.__new__(ResumeETL)
+    etl.trusted = False
+    etl.parsed = {}
+    # Parsed from the extracted XML, so unzipping isn't counted twice
+    etl.raw_paragraphs = timed("xml", lambda: list(iter_xml_paragraphs(io.BytesIO(xml_content))))
+    etl.detector = timed("sections", SectionDetector, etl.raw_paragraphs)
+    etl.template_lang, etl.doc_lang = timed("language", etl.detect_language)
+
+    def sectioning():
+        etl.filter_paragraphs()
+        etl.sections = etl.fetch_sections(etl.template_lang)
+        etl.populate_sections_raw()
+        etl.fields = FieldsExtractor(packs[etl.template_lang], etl.trusted)
+
+    detection = timings["sections"]
+    timed("sections", sectioning)
+    timings["sections"] += detection
+    # Getters extract fields and validate models in one go
+    models = timed("fields", etl.get_sections)
+    timed("pydantic", lambda: {name: section.dict() for name, section in models.items()})
+    timed("notion", lambda: NotionConverter(models, etl.template_lang).convert_resume())
+    timings["total"] = sum(timings.values())
+    return timings
+
+
+def run_normalize(fragments: int = 2000) -> typing.Dict[str, float]:
+    """Times text normalization on inputs that made the previous implementations quadratic"""
+    cases = {
+        "fix_paragraph_chain": (fix_paragraph, [" word"] * fragments),
+        "fix_paragraph_highlights": (
+            fix_paragraph,
+            ["some words ", "highlighted", " and more", "."] * (fragments // 4),
+        ),
+        "fix_paragraph_empty_runs": (fix_paragraph, [""] * fragments + [" word"]),
+        "normalize_text_short": (normalize_text, ["w"] * fragments, 2),
+        "normalize_text_tail": (normalize_text, ["several long enough words"] * fragments + ["w"] * fragments, 2),
+    }
+    timings = {}
+    for case, (func, *args) in cases.items():
+        start = time.perf_counter()
+        func(*args)
+        timings[case] = time.perf_counter() - start
+    return timings
+
+
+def stats(runs: typing.List[typing.Dict[str, float]]) -> dict:
+    return {
+        stage: {"median": statistics.median(r[stage] for r in runs), "min": min(r[stage] for r in runs)}
+        for stage in runs[0]
+    }
+
+
+def benchmark(repeat: int, langs: typing.Iterable[str]) -> dict:
+    warm_up()
+    results = {}
+    for lang in langs:
+        for size, params in sizes.items():
+            data = generate_bytes(lang=lang, **params)
+            results[f"{lang}-{size}"] = stats([run_stages(data) for _ in range(repeat)])
+    results["normalize"] = stats([run_normalize() for _ in range(repeat)])
+    return {
+        "meta": {"parser": __version__, "python": platform.python_version(), "repeat": repeat},
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> typing.List[str]:
+    regressions = []
+    for case, stages in current["results"].items():
+        for stage, timing in stages.items():
+            if (base := baseline["results"].get(case, {}).get(stage)) and timing["min"] > base["min"] * threshold:
+                regressions.append(f"{case} {stage}: {base['min'] * 1000:.2f}ms -> {timing['min'] * 1000:.2f}ms")
+    return regressions
+
+
+def report(current: dict):
+    for case, stages in current["results"].items():
+        line = "  ".join(f"{stage} {timing['median'] * 1000:.2f}" for stage, timing in stages.items())
+        sys.stderr.write(f"{case:<10} {line}  (ms)\n")
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("-n", "--repeat", type=int, default=20)
+    arg_parser.add_argument("-l", "--lang", action="append", choices=packs.keys())
+    arg_parser.add_argument("-o", "--output", help="Write results as JSON")
+    arg_parser.add_argument("--compare", help="JSON results to compare with")
+    arg_parser.add_argument("--threshold", type=float, default=1.2, help="Allowed slowdown ratio")
+    args = arg_parser.parse_args(argv)
+
+    current = benchmark(args.repeat, args.lang or packs.keys())
+    report(current)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            if regressions := compare(current, json.load(f), args.threshold):
+                sys.stderr.write("\n".join(["Regressions:", *regressions]) + "\n")
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
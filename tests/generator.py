@@ -0,0 +1,200 @@
+"""Synthetic hh.ru-style DOCX resumes of controllable size"""
+
+import io
+import random
+import typing
+import zipfile
+from xml.sax.saxutils import escape
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    + '<Default Extension="xml" ContentType="application/xml"/>'
+    + '<Override PartName="/word/document.xml" '
+    + 'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    + "</Types>"
+)
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    + '<Relationship Id="rId1" Target="word/document.xml" '
+    + 'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    + "</Relationships>"
+)
+
+# Words must not contain month names, otherwise experience items are split differently
+vocabulary = {
+    "ru": (
+        "разработка сервисов поддержка команды внедрение проекта анализ данных оптимизация запросов "
+        + "архитектура системы тестирование кода Python Django PostgreSQL Kafka Docker Kubernetes"
+    ).split(),
+    "en": (
+        "development of services support team implementation project data analysis query optimization "
+        + "system architecture code testing Python Django PostgreSQL Kafka Docker Kubernetes"
+    ).split(),
+}
+template = {
+    "ru": {
+        "name": "Иванов Иван Иванович",
+        "general": "Мужчина, 33 года, родился 5 марта 1989",
+        "location": "Москва, готов к переезду, готов к командировкам",
+        "updated": "Резюме обновлено 01.02.2022 10:30",
+        "position": "Python разработчик",
+        "salary": "200 000 руб. на руки",
+        "experience": "Опыт работы —{years} лет 2 месяца",
+        "duration": "Январь {start} — Декабрь {end}",
+        "total": "{years} год 11 месяцев",
+        "company": "Компания {i}",
+        "company_info": "Москва, example.com",
+        "job": "Старший разработчик",
+        "skills": "Ключевые навыки",
+        "driving": ("Опыт вождения", "Имеется собственный автомобиль", "Права категории B"),
+        "about": "Обо мне",
+        "show_more": "Показать еще",
+        "education": "Высшее образование (Магистр)",
+        "university": "Университет {i}",
+        "faculty": "Факультет вычислительной математики",
+        "languages": ("Знание языков", "Русский — Родной", "Английский — C1 — Продвинутый"),
+        "citizenship": (
+            "Гражданство, время в пути до работы",
+            "Гражданство: Россия",
+            "Разрешение на работу: Россия",
+            "Желательное время в пути до работы: Не имеет значения",
+        ),
+    },
+    "en": {
+        "name": "John Smith",
+        "general": "Male, 33 years, born on 5 March 1989",
+        "location": "Moscow, willing to relocate, willing to go on business trips",
+        "updated": "Resume updated 01.02.2022 10:30",
+        "position": "Python developer",
+        "salary": "200 000 rub.",
+        "experience": "Work experience —{years} years 2 months",
+        "duration": "January {start} — December {end}",
+        "total": "{years} year 11 months",
+        "company": "Company {i}",
+        "company_info": "Moscow, example.com",
+        "job": "Senior developer",
+        "skills": "Key skills",
+        "driving": ("Driving experience", "Own car", "Driving license category B"),
+        "about": "About me",
+        "show_more": "Show more",
+        "education": "Higher education (Master)",
+        "university": "University {i}",
+        "faculty": "Faculty of computational mathematics",
+        "languages": ("Languages", "Russian — Native", "English — C1 — Advanced"),
+        "citizenship": (
+            "Citizenship, travel time to work",
+            "Citizenship: Russia",
+            "Permission to work: Russia",
+            "Preferred travel time to work: Doesn't matter",
+        ),
+    },
+}
+
+
+def text_runs(rnd: random.Random, lang: str, words: int) -> typing.List[str]:
+    """Returns text split into runs, with every few words <highlighted> as hh.ru does"""
+    runs, current = [], []
+    for i in range(words):
+        current.append(rnd.choice(vocabulary[lang]))
+        if i % 7 == 6:
+            runs.extend([" ".join(current[:-1]) + " ", current[-1]])
+            current = []
+    if current:
+        runs.append(" " + " ".join(current))
+    return runs
+
+
+def generate_paragraphs(
+    lang: str = "ru", jobs: int = 3, education: int = 1, paragraph_words: int = 20, seed: int = 0
+) -> list:
+    """Returns resume paragraphs: a string for a single run, a list of strings for several runs"""
+    rnd, t = random.Random(seed), template[lang]
+    paragraphs = [
+        t["name"],
+        t["general"],
+        "Контакты",
+        "+7 (999) 123-45-67",
+        "candidate@example.com",
+        t["location"],
+        t["updated"],
+        t["position"],
+        t["salary"],
+        t["experience"].format(years=jobs),
+    ]
+    for i in range(jobs):
+        paragraphs.extend(
+            [
+                t["duration"].format(start=2000 + i, end=2001 + i),
+                t["total"].format(years=1),
+                t["company"].format(i=i),
+                t["company_info"],
+                t["job"],
+                text_runs(rnd, lang, paragraph_words),
+            ]
+        )
+    paragraphs.extend([t["skills"], *rnd.sample(vocabulary[lang][-6:], 4), *t["driving"], t["about"]])
+    paragraphs.extend([text_runs(rnd, lang, paragraph_words), t["show_more"], t["education"]])
+    for i in range(education):
+        paragraphs.extend([str(2010 + i), t["university"].format(i=i), t["faculty"]])
+    paragraphs.extend([*t["languages"], *t["citizenship"]])
+    return paragraphs
+
+
+def paragraph_xml(paragraph: typing.Union[str, list]) -> str:
+    runs = [paragraph] if isinstance(paragraph, str) else paragraph
+    return (
+        '<w:p><w:pPr><w:spacing w:after="0"/><w:jc w:val="left"/></w:pPr>'
+        + "".join(
+            f'<w:r><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:sz w:val="18"/></w:rPr>'
+            + f'<w:t xml:space="preserve">{escape(run)}</w:t></w:r>'
+            for run in runs
+        )
+        + "</w:p>"
+    )
+
+
+def document_xml(paragraphs: list) -> str:
+    # hh.ru lays every paragraph out in a table cell
+    rows = "".join(f"<w:tr><w:tc>{paragraph_xml(p)}</w:tc></w:tr>" for p in paragraphs)
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{W_NS}">'
+        + f"<w:body><w:tbl>{rows}</w:tbl><w:sectPr/></w:body></w:document>"
+    )
+
+
+def generate_docx(file: typing.Union[str, typing.IO[bytes]], **kwargs) -> list:
+    """Writes a DOCX resume and returns its paragraphs, see generate_paragraphs for arguments"""
+    paragraphs = generate_paragraphs(**kwargs)
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as doc:
+        doc.writestr("[Content_Types].xml", CONTENT_TYPES)
+        doc.writestr("_rels/.rels", RELS)
+        doc.writestr("word/document.xml", document_xml(paragraphs))
+    return paragraphs
+
+
+def generate_bytes(**kwargs) -> bytes:
+    file = io.BytesIO()
+    generate_docx(file, **kwargs)
+    return file.getvalue()
+
+
+def paragraph_html(paragraph: typing.Union[str, list]) -> str:
+    runs = [paragraph] if isinstance(paragraph, str) else paragraph
+    first, *rest = map(escape, runs)
+    return f"<p>{first}" + "".join(f'<span class="highlighted">{run}</span>' for run in rest) + "</p>"
+
+
+def generate_html(**kwargs) -> bytes:
+    """Returns the same resume as generate_bytes as an HTML page, see generate_paragraphs for arguments"""
+    blocks = "\n".join(
+        f'  <div class="resume-block">\n    {paragraph_html(p)}\n  </div>' for p in generate_paragraphs(**kwargs)
+    )
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Resume</title>'
+        + "<style>.highlighted { background: yellow }</style></head>\n"
+        + f'<body>\n<div class="resume">\n{blocks}\n</div>\n<!-- footer -->\n</body></html>'
+    ).encode()
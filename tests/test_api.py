@@ -0,0 +1,142 @@
+import asyncio
+import io
+import typing
+
+import httpx
+
+from parser.cache import ResultCache
+from parser.dedup import CandidateIndex
+from parser.etl.writer import NotionWriter
+from parser.metrics import MetricsStore, Registry, registry
+from server import api
+from server.pool import ParserPool
+from tests.generator import generate_bytes
+from tests.test_metrics import value
+from tests.test_writer import FakeNotion
+
+
+def get(path: str) -> httpx.Response:
+    async def run():
+        async with httpx.AsyncClient(app=api.app, base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(run())
+
+
+def test_metrics(monkeypatch, tmp_path):
+    registry.drain()
+    registry.observe("download", 0.01)
+    registry.inc("resume_ok")
+    response = get("/metrics")
+    assert response.status_code == 200
+    assert value(response.text, "parser_stage_seconds_count", stage="download") == 1
+    assert value(response.text, "parser_events_total", event="resume_ok") == 1
+
+    # Another server process has flushed its metrics, the scraped one adds its own before rendering
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    other = Registry()
+    other.inc("resume_ok", 2)
+    store.add(other.drain())
+    monkeypatch.setattr(api, "metrics_store", store)
+    assert value(get("/metrics").text, "parser_events_total", event="resume_ok") == 3
+    assert value(get("/metrics").text, "parser_events_total", event="resume_ok") == 3
+    assert registry.drain()["counters"] == {}
+
+
+def test_pool_input(monkeypatch, tmp_path):
+    """Parser processes get a file on disk by name and a file in memory as bytes, a thread reads it in place"""
+    data = b"resume"
+    monkeypatch.setattr(api.pool, "in_process", False)
+    assert api.pool_input(data) is data
+    assert api.pool_input(io.BytesIO(data)) == data
+    (path := tmp_path / "upload").write_bytes(data)
+    with open(path, "rb") as file:
+        assert api.pool_input(file) == str(path)
+        monkeypatch.setattr(api.pool, "in_process", True)
+        assert api.pool_input(file) is file
+
+
+def write_page(monkeypatch, tmp_path, update: bool) -> typing.Tuple[str, FakeNotion]:
+    notion = FakeNotion()
+    notion.page_blocks["page0"] = ["old"]
+    candidates = CandidateIndex(str(tmp_path / "candidates.db"))
+    candidates.add(["phone:79991234567"], "page0", "https://notion/page0")
+    monkeypatch.setattr(api, "writer", NotionWriter(notion, rate=0))
+    monkeypatch.setattr(api, "candidates", candidates)
+    monkeypatch.setattr(api, "DEDUP_UPDATE", update)
+    result = {
+        "resume": {"contacts": {"phones": ["8 (999) 123-45-67"]}},
+        "notion": {"properties": {}, "children": ["new"]},
+    }
+    return asyncio.run(api.write_page(result)), notion
+
+
+def test_known_candidate(monkeypatch, tmp_path):
+    url, notion = write_page(monkeypatch, tmp_path, update=False)
+    assert url == "https://notion/page0"
+    assert notion.calls == []
+    assert notion.page_blocks == {"page0": ["old"]}
+
+
+def test_known_candidate_updated(monkeypatch, tmp_path):
+    url, notion = write_page(monkeypatch, tmp_path, update=True)
+    assert url == "https://notion/page0"
+    assert "create" not in notion.calls
+    assert notion.page_blocks == {"page0": ["new"]}
+
+
+class FakeWriter:
+    """Creates a page after a while, counting files held by the batch from download to the written page"""
+
+    def __init__(self, holding: typing.List[int]):
+        self.holding = holding
+
+    async def create_page(self, parent_id: str, page: dict) -> dict:
+        await asyncio.sleep(0.01)
+        self.holding.append(self.holding[-1] - 1)
+        return {"id": "page", "url": f"https://notion/{len(self.holding)}"}
+
+
+def test_batch(monkeypatch):
+    data, holding, messages = generate_bytes(), [0], []
+
+    async def download(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        holding.append(holding[-1] + 1)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, content=data)
+
+    async def send_tg_message(message: str, chat_id: typing.Optional[int]):
+        messages.append((message, chat_id))
+
+    async def run():
+        pool = ParserPool(workers=0, queue_size=10)
+        await pool.start()
+        monkeypatch.setattr(api, "pool", pool)
+        monkeypatch.setattr(api, "download_client", httpx.AsyncClient(transport=httpx.MockTransport(download)))
+        try:
+            async with httpx.AsyncClient(app=api.app, base_url="http://test") as client:
+                urls = [f"https://files/{i}" for i in range(6)] + ["https://files/missing"]
+                return await client.post("/batch", json={"urls": urls, "chat_id": 1})
+        finally:
+            pool.shutdown()
+
+    monkeypatch.setattr(api, "BATCH_DOWNLOADS", 2)
+    monkeypatch.setattr(api, "cache", ResultCache(path=None))
+    monkeypatch.setattr(api, "candidates", None)
+    monkeypatch.setattr(api, "search_index", None)
+    monkeypatch.setattr(api, "writer", FakeWriter(holding))
+    monkeypatch.setattr(api, "send_tg_message", send_tg_message)
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["converted"], body["failed"]) == (6, 1)
+    assert body["results"][-1] == {"url": "https://files/missing", "error": "Download failed with status 404"}
+    assert all(r["page"].startswith("https://notion/") for r in body["results"][:-1])
+    assert max(holding) == 2  # Files are downloaded and parsed in parallel, but only BATCH_DOWNLOADS at once
+    ((message, chat_id),) = messages
+    assert chat_id == 1
+    assert message.splitlines()[0] == "Converted 6 of 7"
+    assert message.splitlines()[-1] == "https://files/missing: Download failed with status 404"
@@ -0,0 +1,17 @@
+from tests.benchmark import benchmark, compare
+
+
+def test_benchmark():
+    current = benchmark(repeat=1, langs=["en"])
+    assert set(current["results"]) == {"en-small", "en-medium", "en-large", "normalize"}
+    assert list(current["results"]["en-small"]) == [
+        "unzip",
+        "xml",
+        "sections",
+        "language",
+        "fields",
+        "pydantic",
+        "notion",
+        "total",
+    ]
+    assert compare(current, current, threshold=1.2) == []
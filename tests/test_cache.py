@@ -0,0 +1,54 @@
+import pickle
+
+from parser.cache import ResultCache, cache_key, parse_cached
+from tests.generator import generate_bytes
+
+
+def size(result: dict) -> int:
+    return len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_memory():
+    results = {key: {"resume": key * 10} for key in "abcd"}
+    cache = ResultCache(memory_size=3 * size(results["a"]), path=None)
+    for key in "abc":
+        cache.set(key, results[key])
+    assert cache.get("a") == results["a"]  # Recently used, so "b" goes first
+    cache.set("d", results["d"])
+    assert [cache.get(key) for key in "abcd"] == [results["a"], None, results["c"], results["d"]]
+    assert cache.memory_used == 3 * size(results["a"])
+    cache.set("big", {"resume": "x" * 1000})  # Larger than the whole budget, not kept
+    assert cache.get("big") is None
+    assert cache.memory_used == 3 * size(results["a"])
+
+
+def test_sqlite(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    results = {key: {"resume": key * 100} for key in "abcd"}
+    cache = ResultCache(memory_size=0, path=path, max_size=3 * size(results["a"]))
+    for key in "abc":
+        cache.set(key, results[key])
+    assert cache.get("a") == results["a"]  # Access time is updated, so "b" is the least recently used
+    cache.set("d", results["d"])
+    shared = ResultCache(memory_size=0, path=path)  # Another process
+    assert [shared.get(key) for key in "abcd"] == [results["a"], None, results["c"], results["d"]]
+
+
+def test_parse_cached():
+    data = generate_bytes()
+    cache = ResultCache(path=None)
+    assert list(parse_cached(data, cache, notion=False)) == ["resume"]
+    # A result cached without the page is parsed again when the page is needed
+    result = parse_cached(data, cache)
+    assert list(result) == ["resume", "notion"]
+    assert cache.get(cache_key(data)) == result
+    assert parse_cached(data, cache, notion=False) == result
+
+
+def test_trusted_key():
+    data = generate_bytes()
+    cache = ResultCache(path=None)
+    trusted = parse_cached(data, cache, trusted=True, notion=False)
+    assert cache.get(cache_key(data)) is None
+    assert cache.get(cache_key(data, trusted=True)) == trusted
+    assert cache_key(data, trusted=True).split(":")[-1] == cache_key(data).split(":")[-1]
@@ -0,0 +1,55 @@
+import asyncio
+import typing
+
+import httpx
+import pytest
+
+from server.clients import DownloadError, download
+from tests.generator import generate_bytes, generate_html
+
+DOCX = generate_bytes()
+
+
+async def stream(data: bytes) -> typing.AsyncIterator[bytes]:
+    for i in range(0, len(data), 1000):
+        yield data[i : i + 1000]
+
+
+def fetch(handler: typing.Callable[[httpx.Request], httpx.Response], max_size: int = 0) -> bytearray:
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await download(client, "https://example.com/resume", max_size or len(DOCX))
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("data", [DOCX, generate_html()], ids=["docx", "html"])
+def test_download(data):
+    assert fetch(lambda request: httpx.Response(200, content=data), max_size=len(data)) == data
+    # Chunked, without Content-Length
+    assert fetch(lambda request: httpx.Response(200, content=stream(data)), max_size=len(data)) == data
+
+
+@pytest.mark.parametrize(
+    "response, error",  # Responses are made per test, a streamed body is read once
+    [
+        (lambda: httpx.Response(404, content=DOCX), "status 404"),
+        (lambda: httpx.Response(200, content=DOCX, headers={"content-type": "text/plain"}), "Unsupported content type"),
+        (lambda: httpx.Response(200, content=DOCX + b"\0"), "too large"),  # By Content-Length
+        (lambda: httpx.Response(200, content=stream(DOCX + b"\0")), "too large"),  # Counted while streaming
+        (lambda: httpx.Response(200, content=stream(b"x" * 10**6)), "not a DOCX"),  # By the first bytes
+        (lambda: httpx.Response(200, content=b"short text"), "not a DOCX"),  # Shorter than the sniffed head
+        (lambda: httpx.Response(200, content=DOCX, headers={"content-length": "abc"}), "Invalid Content-Length"),
+    ],
+)
+def test_rejects(response, error):
+    with pytest.raises(DownloadError, match=error):
+        fetch(lambda request: response())
+
+
+def test_transport_error():
+    def fail(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    with pytest.raises(DownloadError, match="connection refused"):
+        fetch(fail)
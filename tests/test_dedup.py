@@ -0,0 +1,23 @@
+from parser.dedup import CandidateIndex, fingerprints, normalize_phone
+
+
+def test_fingerprints():
+    assert normalize_phone("8 (999) 123-45-67") == normalize_phone("+7 999 123 45 67") == "79991234567"
+    assert normalize_phone("12-34") is None
+    contacts = {"phones": ["+7 (999) 123-45-67", None], "emails": [" Candidate@Example.com"]}
+    assert fingerprints(contacts) == ["email:candidate@example.com", "phone:79991234567"]
+    assert fingerprints(None) == []
+
+
+def test_candidate_index(tmp_path):
+    path = str(tmp_path / "candidates.sqlite3")
+    index = CandidateIndex(path)
+    assert index.find(["phone:79991234567"]) is None
+    index.add(["email:a@example.com", "phone:79991234567"], "page-1", "https://notion/1")
+    # Another worker or a restarted server sees the same candidates
+    other = CandidateIndex(path)
+    assert other.find(["phone:79991234567", "email:new@example.com"]) == {
+        "page_id": "page-1",
+        "url": "https://notion/1",
+    }
+    assert other.find([]) is None
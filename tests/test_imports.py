@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+from config import PROJECT_ROOT
+
+# Cumulative import time budgets in seconds, a few times the usual time to catch regressions only
+budgets = {"server.api": 1.0, "parse": 0.3}
+# Loaded by warm_up() or on first use, never on import
+lazy_modules = ("langdetect", "sentry_sdk", "parser.etl.resume", "parser.models")
+
+
+def import_times(module: str) -> dict:
+    """Returns cumulative import time of every module imported by `module` in a fresh interpreter, in seconds"""
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    subprocess.run(command, cwd=PROJECT_ROOT, check=True, capture_output=True)  # Compiles bytecode first
+    stderr = subprocess.run(command, cwd=PROJECT_ROOT, check=True, capture_output=True, text=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+@pytest.mark.parametrize("module", budgets)
+def test_import_time(module):
+    times = import_times(module)
+    assert not [name for name in lazy_modules if name in times]
+    assert times[module] < budgets[module]
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from server.jobs import Job, JobQueue, JobStore, QueueFullError
+
+
+async def handler(job: Job) -> str:
+    if job.url == "bad":
+        raise ValueError("bad url")
+    await asyncio.sleep(0.01 if job.url == "slow" else 0)
+    return f"done {job.url}"
+
+
+async def hang(job: Job) -> str:
+    await asyncio.Event().wait()
+
+
+async def finished(queue: JobQueue):
+    while queue.store.db.execute("SELECT COUNT(*) FROM jobs WHERE finished IS NULL").fetchone()[0]:
+        await asyncio.sleep(0.01)
+
+
+def test_job_queue(tmp_path):
+    async def run():
+        queue = JobQueue(handler, workers=2, queue_size=5, path=str(tmp_path / "jobs.db"), history=3)
+        await queue.start()
+        submitted = [queue.submit(url) for url in ("a", "b", "c", "d", "bad")]
+        with pytest.raises(QueueFullError):
+            queue.submit("e")
+        await finished(queue)
+        await queue.stop()
+        return queue, submitted
+
+    queue, submitted = asyncio.run(run())
+    assert queue.store.db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 3
+    assert queue.get(submitted[0].job_id) is None
+    assert queue.get(submitted[4].job_id).status == "failed"
+    assert queue.get(submitted[4].job_id).error == "bad url"
+    assert queue.get(submitted[3].job_id).result == "done d"
+
+
+def test_shared_store(tmp_path):
+    """A job queued by one server process is seen by another"""
+    path = str(tmp_path / "jobs.db")
+
+    async def run():
+        queue = JobQueue(handler, workers=1, queue_size=5, path=path)
+        await queue.start()
+        job = queue.submit("a")
+        assert JobStore(path).get(job.job_id).status == "queued"
+        await finished(queue)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert JobStore(path).get(job.job_id).result == "done a"
+
+
+def test_stop(tmp_path):
+    """Running jobs get time to finish, those that haven't started are left queued for another process"""
+    path = str(tmp_path / "jobs.db")
+
+    async def run():
+        queue = JobQueue(handler, workers=1, queue_size=5, path=path)
+        await queue.start()
+        running, queued = queue.submit("slow"), queue.submit("a")
+        await asyncio.sleep(0)
+        await queue.stop(timeout=1)
+        left = queue.get(queued.job_id)
+
+        other = JobQueue(handler, workers=1, queue_size=5, path=path, poll_interval=0.01)
+        await other.start()
+        await finished(other)
+        await other.stop()
+        return running, queued, left
+
+    running, queued, left = asyncio.run(run())
+    assert left.status == "queued"
+    assert JobStore(path).get(running.job_id).result == "done slow"
+    assert JobStore(path).get(queued.job_id).result == "done a"
+
+
+def test_stop_timeout(tmp_path):
+    async def run():
+        queue = JobQueue(hang, workers=1, queue_size=5, path=str(tmp_path / "jobs.db"))
+        await queue.start()
+        job = queue.submit("a")
+        await asyncio.sleep(0)
+        assert queue.get(job.job_id).status == "running"
+        await queue.stop(timeout=0.01)
+        return queue.get(job.job_id)
+
+    job = asyncio.run(run())
+    assert job.status == "failed"
+    assert job.error == "Server stopped before the job finished"
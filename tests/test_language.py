@@ -0,0 +1,56 @@
+import io
+
+import langdetect
+import pytest
+
+from parser.constants import DOC_LANG_SAMPLE
+from parser.etl.language import detect_doc_lang, sample_text
+from parser.etl.resume import ResumeETL
+from tests.generator import generate_bytes
+
+
+def fail(text):
+    raise AssertionError("langdetect must not run when one script prevails")
+
+
+def test_ratio(monkeypatch):
+    monkeypatch.setattr(langdetect, "detect_langs", fail)
+    assert detect_doc_lang(["Разработка сервисов на Python", "Москва, готов к переезду"]) == "ru"
+    assert detect_doc_lang(["Development of backend services", "Москва"]) == "en"
+
+
+@pytest.mark.parametrize("lang", ["ru", "en"])
+def test_resume_lang(monkeypatch, lang):
+    """Generated resumes have tech terms, emails and links, still their script decides without langdetect"""
+    monkeypatch.setattr(langdetect, "detect_langs", fail)
+    for seed in range(5):
+        etl = ResumeETL(io.BytesIO(generate_bytes(lang=lang, jobs=10, seed=seed)))
+        assert etl.detect_language() == (lang, lang)
+
+
+def test_fallback(monkeypatch):
+    calls = []
+
+    def detect_langs(text):
+        calls.append(text)
+        return detect(text)
+
+    detect = langdetect.detect_langs
+    monkeypatch.setattr(langdetect, "detect_langs", detect_langs)
+    # Mixed scripts, neither prevails, so a sample of the text goes to langdetect
+    mixed = [
+        "Developed backend services for the company and the whole team",
+        "Разрабатывал сервисы для компании и команды",
+    ]
+    assert detect_doc_lang(mixed * 1000) == "en"
+    assert len(calls) == 1 and len(calls[0]) <= DOC_LANG_SAMPLE
+
+
+def test_sample_text():
+    paragraphs = [f"{i:04}" for i in range(1000)]  # 4000 characters
+    sample = sample_text(paragraphs, 100)
+    assert len(sample) <= 100
+    # Every 40th paragraph is taken, so the sample spans the whole text rather than its beginning
+    assert sample.split()[:3] == ["0000", "0040", "0080"]
+    assert sample_text(paragraphs, 10**6) == " ".join(paragraphs)
+    assert sample_text(["short"], 100) == "short"
@@ -0,0 +1,69 @@
+import pytest
+
+from parser.metrics import BUCKETS, MetricsStore, Registry
+
+
+def test_store(tmp_path):
+    """Every server process adds its metrics, any of them renders the totals"""
+    path = str(tmp_path / "metrics.db")
+    for seconds in (0.003, 0.2):
+        process = Registry()
+        process.observe("parse", seconds)
+        process.inc("resume_ok")
+        MetricsStore(path).add(process.drain())
+
+    total = MetricsStore(path).load()
+    assert total.counters == {"resume_ok": 2}
+    assert total.histograms["parse"][-2:] == [0.203, 2]
+    assert MetricsStore(path).load().render() == total.render()
+
+
+def value(text: str, name: str, **labels) -> float:
+    """Value of a sample in Prometheus text format"""
+    selector = ",".join(f'{key}="{label}"' for key, label in labels.items())
+    samples = dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+    return float(samples[name + "{" + selector + "}"])
+
+
+def buckets(text: str, stage: str) -> dict:
+    lines = [line for line in text.splitlines() if f'stage="{stage}",le="' in line]
+    bounds = [line.split('le="')[1].split('"')[0] for line in lines]
+    assert bounds == [*map(str, BUCKETS), "+Inf"]
+    return {le: value(text, "parser_stage_seconds_bucket", stage=stage, le=le) for le in bounds}
+
+
+def test_render():
+    metrics = Registry()
+    for seconds in (0.0005, 0.003, 0.003, 0.2, 100):
+        metrics.observe("parse", seconds)
+    metrics.inc("resume_ok", 2)
+    text = metrics.render()
+
+    counts = buckets(text, "parse")
+    assert counts["0.001"] == 1
+    assert counts["0.005"] == 3
+    assert counts["0.25"] == counts["30.0"] == 4  # Cumulative, every bucket counts the smaller ones
+    assert counts["+Inf"] == 5  # Longer than the largest bucket only gets here
+    assert value(text, "parser_stage_seconds_sum", stage="parse") == pytest.approx(100.2065)
+    assert value(text, "parser_stage_seconds_count", stage="parse") == 5
+    assert value(text, "parser_events_total", event="resume_ok") == 2
+
+
+def test_merge():
+    """Snapshots of worker processes add up in the server's registry"""
+    server, worker = Registry(), Registry()
+    server.observe("parse", 0.003)
+    server.inc("resume_ok")
+    for _ in range(2):
+        worker.observe("parse", 0.2)
+        worker.observe("get_paragraphs", 0.003)
+        worker.inc("resume_ok")
+        server.merge(worker.drain())
+
+    assert worker.drain() == {"histograms": {}, "counters": {}}
+    text = server.render()
+    assert value(text, "parser_events_total", event="resume_ok") == 3
+    assert value(text, "parser_stage_seconds_count", stage="parse") == 3
+    assert value(text, "parser_stage_seconds_count", stage="get_paragraphs") == 2
+    assert buckets(text, "parse")["0.005"] == 1
+    assert buckets(text, "parse")["0.25"] == 3
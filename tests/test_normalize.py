@@ -0,0 +1,67 @@
+import random
+
+import pytest
+from funcy import with_next
+
+from parser.converters.docx import normalize_text
+from parser.models.utils import fix_paragraph
+
+
+def reference_fix_paragraph(paragraph: list):
+    """Previous fixed-point implementation of fix_paragraph"""
+    paragraph = paragraph.copy()
+    while True:
+        new_paragraph = []
+        skip = False
+        for w, next_w in with_next(paragraph, fill=""):
+            if skip:
+                skip = False
+                continue
+            if w.endswith(" "):
+                new_paragraph.append(f"{w}{next_w}")
+                skip = True
+            elif next_w.startswith(" ") or next_w.startswith(","):
+                new_paragraph.append(f"{w}{next_w}")
+                skip = True
+            else:
+                new_paragraph.append(w)
+        if paragraph != new_paragraph:
+            paragraph = new_paragraph.copy()
+        else:
+            break
+
+    return paragraph[0] if len(paragraph) == 1 else paragraph
+
+
+def reference_normalize_text(text: list, threshold: int):
+    """Previous restarting implementation of normalize_text"""
+    text = text.copy()
+    i = 1
+    while i < len(text):
+        if len(text[i].split()) < threshold or len(text[i - 1].split()) < threshold:
+            text[i - 1 : i + 1] = ["".join(text[i - 1 : i + 1])]
+            i = 0
+        i += 1
+
+    return text[0] if len(text) == 1 else text
+
+
+def random_fragments(rnd: random.Random) -> list:
+    alphabet = ["", "a", "bc", " ", "  ", ",", ", ", "d ", " e", "\n", "\xa0", "f\tg"]
+    return ["".join(rnd.choices(alphabet, k=rnd.randint(0, 4))) for _ in range(rnd.randint(0, 12))]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fix_paragraph_equivalence(seed):
+    rnd = random.Random(seed)
+    for _ in range(500):
+        fragments = random_fragments(rnd)
+        assert fix_paragraph(fragments) == reference_fix_paragraph(fragments), fragments
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_normalize_text_equivalence(seed):
+    rnd = random.Random(seed)
+    for _ in range(500):
+        fragments, threshold = random_fragments(rnd), rnd.randint(0, 4)
+        assert normalize_text(fragments, threshold) == reference_normalize_text(fragments, threshold), fragments
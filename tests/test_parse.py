@@ -0,0 +1,9 @@
+from parse import collect_files
+
+
+def test_collect_files(tmp_path):
+    for name in ["a.docx", "b.html", "nested/c.HTM", "d.txt", "e.docx/f.pdf"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).touch()
+    files = collect_files([str(tmp_path)])
+    assert sorted(files) == [str(tmp_path / name) for name in ["a.docx", "b.html", "nested/c.HTM"]]
@@ -1,7 +1,12 @@
+import io
+import zipfile
+
 import pytest
 
-from config import TEST_DATA
+from config import TEST_DATA, DocumentSizeError
+from parser.converters.docx import LimitedReader
 from parser.etl import ResumeETL
+from tests.generator import W_NS, generate_bytes, generate_html, template
 
 paths = [str(i) for i in TEST_DATA.rglob("*.docx")]
 
@@ -14,3 +19,78 @@ def test_parser(file_path):
         assert resume
         notion = etl.to_notion()
         assert notion
+
+
+@pytest.mark.parametrize("lang", ["ru", "en"])
+@pytest.mark.parametrize("jobs", [1, 40])
+def test_generated(lang, jobs):
+    data = generate_bytes(lang=lang, jobs=jobs, education=2)
+    etl = ResumeETL(file=io.BytesIO(data))
+    assert (etl.template_lang, etl.doc_lang) == (lang, lang)
+    resume = etl.get_resume()
+    assert resume["general"]["age"] == 33
+    assert resume["contacts"]["emails"] == ["candidate@example.com"]
+    assert len(resume["experience"]["items"]) == jobs
+    assert len(resume["education"]["items"]) == 2
+    assert resume["driving"]["own_car"]
+    notion = etl.to_notion()
+    assert len(notion["children"]) > 4 * jobs
+
+
+@pytest.mark.parametrize("lang", ["ru", "en"])
+def test_trusted(lang):
+    data = generate_bytes(lang=lang, jobs=5, education=2)
+    validated = ResumeETL(file=io.BytesIO(data)).get_resume()
+    assert ResumeETL(file=io.BytesIO(data), trusted=True).get_resume() == validated
+
+
+def test_selective():
+    data = generate_bytes(jobs=5, education=2)
+    etl = ResumeETL(file=io.BytesIO(data))
+    resume = etl.get_resume(sections=["position", "contacts"])
+    assert list(resume) == ["contacts", "position"]
+    assert set(etl.parsed) == {"contacts", "position"}
+    assert etl.section("contacts") is etl.section("contacts")
+    assert etl.section("portfolio") is None
+    assert etl.get_resume() == ResumeETL(file=io.BytesIO(data)).get_resume()
+
+
+@pytest.mark.parametrize("lang", ["ru", "en"])
+def test_html(lang):
+    params = {"lang": lang, "jobs": 5, "education": 2}
+    from_html = ResumeETL(file=io.BytesIO(generate_html(**params)))
+    assert from_html.get_resume() == ResumeETL(file=io.BytesIO(generate_bytes(**params))).get_resume()
+
+
+def test_zip_bomb():
+    file = io.BytesIO()
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as doc:
+        doc.writestr("word/document.xml", f'<w:document xmlns:w="{W_NS}">{" " * 10**7}</w:document>')
+    file.seek(0)
+    with pytest.raises(DocumentSizeError, match="compressed"):
+        ResumeETL(file=file)
+    with zipfile.ZipFile(io.BytesIO(generate_bytes())) as doc, pytest.raises(DocumentSizeError, match="larger"):
+        LimitedReader(doc, "word/document.xml", max_size=1000)
+
+
+def test_getter_errors(monkeypatch, caplog):
+    """A getter failing on an unexpected paragraph costs its section only, as it did before getters were timed"""
+
+    def get_skills(self, raw):
+        raise AttributeError("bug in a getter")
+
+    monkeypatch.setattr(ResumeETL, "get_skills", get_skills)
+    etl = ResumeETL(file=io.BytesIO(generate_bytes()))
+    assert etl.section("skills") is None
+    assert "Getter of <skills> section failed" in caplog.text
+    resume = etl.get_resume()
+    assert "skills" not in resume and resume["driving"]["own_car"]
+
+
+@pytest.mark.parametrize("lang", ["ru", "en"])
+def test_driving_runs(lang):
+    title, own_car, categories = template[lang]["driving"]
+    etl = ResumeETL(file=io.BytesIO(generate_bytes(lang=lang)))
+    driving = etl.get_driving([title, [own_car[:3], own_car[3:]], [categories[:-1], categories[-1]]])
+    assert driving.own_car
+    assert driving.categories == ["B"]
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+import sentry_sdk
+
+from parser import metrics
+from parser.metrics import registry, timed
+from server.pool import ParserPool, PoolSaturatedError
+
+
+def crash(code: int) -> int:
+    os._exit(code)
+
+
+def stage() -> int:
+    with timed("stage"):
+        time.sleep(0.01)
+    return os.getpid()
+
+
+def test_restart():
+    async def run():
+        pool = ParserPool(workers=2, queue_size=2)
+        await pool.start()
+        executor = pool.executor
+        try:
+            results = await asyncio.gather(pool.run(crash, 1), pool.run(abs, -1), return_exceptions=True)
+            assert isinstance(results[0], BrokenProcessPool)
+            assert pool.executor is not executor
+            assert await pool.run(abs, -2) == 2
+        finally:
+            pool.shutdown()
+
+    registry.drain()
+    asyncio.run(run())
+    assert registry.drain()["counters"]["pool_restart"] == 1
+
+
+def test_saturated():
+    async def run():
+        pool = ParserPool(workers=0, queue_size=0)
+        await pool.start()
+        try:
+            with pytest.raises(ZeroDivisionError):
+                await pool.run(divmod, 1, 0)
+            pool.pending = pool.limit
+            with pytest.raises(PoolSaturatedError):
+                await pool.run(abs, -1)
+        finally:
+            pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_wait():
+    async def run():
+        pool = ParserPool(workers=0, queue_size=1)
+        await pool.start()
+        try:
+            tasks = [asyncio.create_task(pool.run(time.sleep, 0.05, wait=True)) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            assert pool.pending == pool.limit == 2
+            with pytest.raises(PoolSaturatedError):
+                await pool.run(abs, -1)
+            await asyncio.gather(*tasks)
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_spans(monkeypatch, workers):
+    """Stages timed by the pool become spans of the request's transaction in the server process"""
+    monkeypatch.setattr(metrics, "METRICS_SPANS_SAMPLE_RATE", 1)
+
+    async def run():
+        pool = ParserPool(workers=workers, queue_size=1)
+        await pool.start()
+        try:
+            hub = sentry_sdk.Hub(sentry_sdk.Client(traces_sample_rate=1.0))
+            with hub, hub.start_transaction(name="request") as transaction:
+                pid = await pool.run(stage)
+                spans = transaction._span_recorder.spans  # noqa: SF01
+            return pid, transaction, spans
+        finally:
+            pool.shutdown()
+
+    pid, transaction, spans = asyncio.run(run())
+    assert (pid == os.getpid()) == (workers == 0)
+    (span,) = [span for span in spans if span.op == "stage"]
+    assert span.parent_span_id == transaction.span_id
+    assert 0.01 <= (span.timestamp - span.start_timestamp).total_seconds() < 1
@@ -0,0 +1,26 @@
+import io
+import json
+
+from parser.etl import ResumeETL
+from parser.search import SearchIndex, to_match
+from tests.generator import generate_bytes
+
+
+def test_to_match():
+    assert to_match('C++ python* "quoted" разраб*') == '"C++" "python"* "quoted" "разраб"*'
+    assert to_match("  ") == ""
+
+
+def test_search(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    ru = ResumeETL(file=io.BytesIO(generate_bytes(lang="ru"))).get_resume()
+    en = ResumeETL(file=io.BytesIO(generate_bytes(lang="en"))).get_resume()
+    # Bulk loading takes batch JSON lines, where dates are strings
+    en = json.loads(json.dumps(en, default=str))
+    assert index.add_many([("ru.docx", ru, None), ("en.docx", en, None)]) == 2
+    index.add("ru.docx", ru, "https://notion/1")
+
+    assert {r["source"] for r in index.search("python")} == {"ru.docx", "en.docx"}
+    assert [(r["source"], r["url"]) for r in index.search("москва разработчик")] == [("ru.docx", "https://notion/1")]
+    assert [r["name"] for r in index.search("develop*")] == ["John Smith"]
+    assert index.search("cobol") == []
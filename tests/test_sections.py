@@ -0,0 +1,57 @@
+import random
+import re
+from collections import defaultdict
+
+import funcy as fc
+import pytest
+
+import parser.models as models
+from parser.constants import SECTION_TITLE_MAX, show_more
+from parser.etl.sections import SectionDetector
+from tests.generator import generate_paragraphs, template
+
+
+def reference_fetch_sections(paragraphs: list, lang: str) -> dict:
+    """Previous implementation of ResumeETL.fetch_sections, one scan per section"""
+    sections = defaultdict()
+    sections["general"] = {"title": "", "index": (curr_index := 0)}
+
+    sections_re = {k: v.re(lang) for k, v in models.all_sections.items()}
+    for k, v in sections_re.items():
+        for i, par in enumerate(paragraphs):
+            if len(par_flat := fc.str_join(par)) < SECTION_TITLE_MAX:
+                if re.search(rf"{v['title']}", par_flat, re.IGNORECASE) and i > curr_index:
+                    sections[k] = {"title": v["title"], "index": i}
+                    curr_index = i
+
+    return sections
+
+
+def shuffled_paragraphs(lang: str, seed: int) -> list:
+    """Generated resume with section titles of both languages and "show more" links inserted at random"""
+    rnd = random.Random(seed)
+    paragraphs = generate_paragraphs(lang=lang, jobs=rnd.randint(1, 5), seed=seed)
+    titles = [t for t in (*template["ru"].values(), *template["en"].values()) if isinstance(t, str)]
+    for _ in range(10):
+        extra = rnd.choice([*titles, show_more["ru"], show_more["en"], ["Опыт ", "работы"]])
+        paragraphs.insert(rnd.randrange(len(paragraphs)), extra)
+    return paragraphs
+
+
+@pytest.mark.parametrize("lang", ["ru", "en"])
+@pytest.mark.parametrize("seed", range(20))
+def test_fetch(lang, seed):
+    paragraphs = shuffled_paragraphs(lang, seed)
+    detector = SectionDetector(paragraphs)
+    for template_lang in ("ru", "en"):
+        assert detector.fetch(template_lang) == reference_fetch_sections(paragraphs, template_lang)
+        visible = [p for p in paragraphs if show_more[template_lang] not in fc.str_join(p)]
+        assert detector.fetch(template_lang, visible=True) == reference_fetch_sections(visible, template_lang)
+
+
+def test_title_languages():
+    class Hobbies(models.Section):
+        title = models.resume.Title(ru="Хобби", en="Hobbies", de="Hobbys")
+
+    assert Hobbies.re("de") == {"title": "^Hobbys$", "min_length": 2}
+    assert models.Skills.re("de") is None
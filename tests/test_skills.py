@@ -0,0 +1,31 @@
+import io
+
+from parser.etl import ResumeETL
+from parser.etl.skills import Automaton, extract_skills
+from tests.generator import generate_bytes
+
+
+def test_automaton():
+    automaton = Automaton({"he": "he", "she": "she", "his": "his", "hers": "hers"})
+    assert sorted(automaton.iter_matches("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_extract_skills():
+    assert extract_skills(["JavaScript, Java и Postgres", "postgresql, Node.js; ML-модели"]) == [
+        "PostgreSQL",
+        "JavaScript",
+        "Java",
+        "Node.js",
+        "Machine Learning",
+    ]
+    # Terms inside longer words and unknown words are not skills
+    assert extract_skills(["Javanese pythonic scalable", ""]) == []
+
+
+def test_technologies():
+    etl = ResumeETL(file=io.BytesIO(generate_bytes(lang="en", paragraph_words=100)))
+    technologies = etl.get_sections(["technologies"])["technologies"]
+    assert set(technologies.items) == {"Python", "Django", "PostgreSQL", "Kafka", "Docker", "Kubernetes"}
+    # Derived sections parse what they depend on, and only that
+    assert set(etl.parsed) == {"technologies", "experience", "about", "skills"}
+    assert etl.get_resume()["technologies"] == technologies.dict()
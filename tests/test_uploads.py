@@ -0,0 +1,85 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+from parser.cache import cache_key, file_key, parse
+from parser.constants import FORM_OVERHEAD
+from server.uploads import UploadError, read_upload, spool
+from tests.generator import generate_bytes
+
+
+async def chunks(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+@pytest.mark.parametrize("spool_size", [100, 10**7])
+def test_spool(spool_size):
+    data = generate_bytes(jobs=5)
+    file = asyncio.run(spool(chunks(data), len(data), spool_size))
+    assert file_key(file) == cache_key(data)
+    assert parse(file)["resume"] == parse(data)["resume"]
+    if spool_size < len(data):  # On disk, a parser process opens it by name
+        assert parse(file.name)["resume"] == parse(data)["resume"]
+    else:
+        assert isinstance(file, io.BytesIO)
+    file.close()
+
+
+def test_spool_rejects():
+    data = generate_bytes()
+    with pytest.raises(UploadError, match="too large"):
+        asyncio.run(spool(chunks(data), len(data) - 1, 100))
+    with pytest.raises(UploadError, match="not a DOCX"):
+        asyncio.run(spool(chunks(b"plain text"), len(data), 100))
+
+
+def make_request(body: bytes, content_type: str) -> Request:
+    """Request with a chunked body, so without Content-Length"""
+    messages = [
+        {"type": "http.request", "body": body[i : i + 1000], "more_body": True} for i in range(0, len(body), 1000)
+    ]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    headers = [(b"content-type", content_type.encode()), (b"transfer-encoding", b"chunked")]
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+@pytest.mark.parametrize("multipart", [True, False])
+def test_read_upload(multipart):
+    data = generate_bytes()
+    if multipart:
+        form = httpx.Request("POST", "https://t", files={"file": ("a.docx", data)})
+        body, content_type = form.read(), form.headers["content-type"]
+    else:
+        body, content_type = data, "application/octet-stream"
+    file = asyncio.run(read_upload(make_request(body, content_type), len(data), 100))
+    assert file_key(file) == cache_key(data)
+    file.close()
+    with pytest.raises(UploadError, match="too large"):
+        asyncio.run(read_upload(make_request(body + b"\0" * 2 * FORM_OVERHEAD, content_type), len(data), 100))
+
+
+def test_read_upload_on_disk():
+    """The form parser spools a large file to an unnamed file, a named copy is returned instead"""
+    data = generate_bytes() + b"\0" * 2 * 1024 * 1024
+    form = httpx.Request("POST", "https://t", files={"file": ("a.docx", data)})
+    file = asyncio.run(read_upload(make_request(form.read(), form.headers["content-type"]), len(data), 100))
+    assert isinstance(file.name, str)
+    with open(file.name, "rb") as copy:
+        assert copy.read() == data
+    assert file_key(file) == cache_key(data)
+    file.close()
+
+
+def test_invalid_content_length():
+    request = make_request(generate_bytes(), "application/octet-stream")
+    request.scope["headers"].append((b"content-length", b"abc"))
+    with pytest.raises(UploadError, match="Invalid Content-Length"):
+        asyncio.run(read_upload(request, 10**6, 100))
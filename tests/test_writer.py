@@ -0,0 +1,157 @@
+import asyncio
+
+import httpx
+import pytest
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from parser.etl import writer as writer_module
+from parser.etl.writer import NotionWriter, RateLimiter
+
+
+def response_error(status: int, **headers) -> HTTPResponseError:
+    return HTTPResponseError(httpx.Response(status, headers=headers, request=httpx.Request("POST", "https://notion")))
+
+
+def timeout(exception: type = httpx.ReadTimeout) -> RequestTimeoutError:
+    """Raises RequestTimeoutError as notion_client does, in place of the httpx timeout"""
+    try:
+        try:
+            raise exception("timed out")
+        except httpx.TimeoutException:
+            raise RequestTimeoutError()
+    except RequestTimeoutError as e:
+        return e
+
+
+class FakeNotion:
+    """Keeps pages as lists of blocks. `failures` are raised by calls in turn, before (or after) applying them"""
+
+    def __init__(self, failures: list = ()):
+        self.pages = self
+        self.blocks = self
+        self.children = self
+        self.page_blocks = {}
+        self.failures = list(failures)
+        self.calls = []
+
+    def fail(self, name: str, applied: bool):
+        if self.failures and self.failures[0][0] == name and self.failures[0][2] == applied:
+            raise self.failures.pop(0)[1]
+
+    async def create(self, parent, properties, children):
+        self.calls.append("create")
+        self.fail("create", False)
+        page_id = f"page{len(self.page_blocks)}"
+        self.page_blocks[page_id] = list(children)
+        self.fail("create", True)
+        return {"id": page_id, "url": f"https://notion/{page_id}"}
+
+    async def append(self, block_id, children):
+        self.calls.append("append")
+        self.fail("append", False)
+        self.page_blocks[block_id].extend(children)
+        self.fail("append", True)
+        return {}
+
+    async def update(self, page_id, properties):
+        self.calls.append("update")
+        return {"id": page_id, "url": f"https://notion/{page_id}"}
+
+    async def delete(self, block_id):
+        self.calls.append("delete")
+        for blocks in self.page_blocks.values():
+            blocks[:] = [block for block in blocks if str(block) != block_id]
+        return {}
+
+    async def list(self, block_id, start_cursor=None):
+        self.calls.append("list")
+        start = int(start_cursor or 0)
+        results = [{"id": str(b)} for b in self.page_blocks[block_id][start : start + 100]]
+        next_cursor = str(start + 100) if start + 100 < len(self.page_blocks[block_id]) else None
+        return {"results": results, "next_cursor": next_cursor}
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(writer_module.asyncio, "sleep", sleep)
+    return slept
+
+
+def write(notion: FakeNotion, blocks: int, **kwargs) -> dict:
+    writer = NotionWriter(notion, retries=3, backoff=1, rate=0)
+    page = {"properties": {}, "children": iter(range(blocks))}
+    return asyncio.run(writer.create_page("parent", page, **kwargs))
+
+
+@pytest.mark.parametrize("blocks", [0, 1, 100, 101, 250, 300])
+def test_chunks(blocks, delays):
+    notion = FakeNotion()
+    response = write(notion, blocks)
+    assert notion.page_blocks[response["id"]] == list(range(blocks))
+    assert notion.calls == ["create"] + ["append"] * ((max(blocks, 1) - 1) // 100)
+    assert delays == []
+
+
+def test_retry_after(delays):
+    notion = FakeNotion(
+        [
+            ("create", response_error(429, **{"retry-after": "5"}), False),
+            ("create", timeout(httpx.ConnectTimeout), False),
+        ]
+    )
+    response = write(notion, 10)
+    assert notion.page_blocks == {response["id"]: list(range(10))}
+    assert delays == [5, 2]  # Retry-After over backoff, then the exponential backoff
+
+
+def test_create_not_repeated(delays):
+    # The page may have been created, repeating the request could make a duplicate
+    for error in (timeout(), response_error(502)):
+        notion = FakeNotion([("create", error, True)])
+        with pytest.raises(type(error)):
+            write(notion, 10)
+        assert notion.calls == ["create"] and len(notion.page_blocks) == 1
+
+
+@pytest.mark.parametrize("applied", [True, False])
+def test_append_checked(applied, delays):
+    notion = FakeNotion([("append", timeout(), applied)])
+    response = write(notion, 250)
+    assert notion.page_blocks[response["id"]] == list(range(250))
+    # Children are listed 100 at a time: 200 if the chunk was appended, 100 if it should be sent again
+    expected = (
+        ["create", "append", "list", "list", "append"] if applied else ["create", "append", "list", "append", "append"]
+    )
+    assert notion.calls == expected
+
+
+def test_rate_limiter(monkeypatch):
+    now = [100.0]
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(writer_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(writer_module.asyncio, "sleep", sleep)
+    limiter = RateLimiter(4)
+
+    async def run():
+        await asyncio.gather(*[limiter.wait() for _ in range(3)])
+
+    asyncio.run(run())
+    assert slept == [0.25, 0.5]
+
+
+def test_update_page(delays):
+    notion = FakeNotion()
+    notion.page_blocks["page0"] = list(range(150))
+    writer = NotionWriter(notion, retries=3, backoff=1, rate=0)
+    asyncio.run(writer.update_page("page0", {"properties": {}, "children": iter(["a", "b"])}))
+    assert notion.page_blocks["page0"] == ["a", "b"]
+    assert notion.calls == ["update", "list", "list"] + ["delete"] * 150 + ["append"]